@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,7 +6,105 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int
+    JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    # How often each worker pulls refresh-token revocations made by others
+    REVOCATION_SYNC_INTERVAL_SECONDS: float = 5.0
     TRANSACTION_SERVICE_URL: str
+
+    # --- Connection pool ---
+    # "queue" for long-running servers, "null" (no pooling) for serverless
+    # deployments such as the vercel.json build
+    DB_POOL_MODE: str = "queue"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # --- Async database mode ---
+    # Serves the hot /accounts endpoints with async def handlers on an AsyncEngine
+    DATABASE_ASYNC_MODE: bool = False
+    # Defaults to DATABASE_URL with the driver swapped to asyncpg / aiosqlite
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # --- Password hashing ---
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: Optional[int] = None  # None = one per CPU core
+    PASSWORD_HASH_MAX_PENDING: int = 64  # beyond this, auth endpoints answer 503
+
+    # --- Verified-JWT decode cache ---
+    TOKEN_CACHE_MAXSIZE: int = 10000
+
+    # --- Authenticated-principal cache ---
+    PRINCIPAL_CACHE_MAXSIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+
+    # --- Transfers ---
+    TRANSFER_BATCH_MAX_LEGS: int = 10000
+
+    # --- Idempotency keys (withdraw, transfer, admin credit/debit) ---
+    IDEMPOTENCY_KEY_TTL_SECONDS: float = 86400.0
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+    IDEMPOTENCY_CACHE_MAXSIZE: int = 10000
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 3600.0
+
+    # --- Admin bulk operations ---
+    CUSTOMER_PURGE_MAX_IDS: int = 1000
+    IMPORT_CHUNK_SIZE: int = 1000
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    # --- Periodic balance processing (interest / fees) ---
+    # Rate tables keyed by account_type: interest is a rate per period,
+    # fees a flat amount per period (JSON in the environment)
+    BATCH_INTEREST_RATES: Dict[str, float] = {"savings": 0.0025}
+    BATCH_MAINTENANCE_FEES: Dict[str, float] = {"checking": 2.0}
+    BATCH_CHUNK_SIZE: int = 1000
+    BATCH_MAX_CHUNKS_PER_REQUEST: int = 20  # The admin endpoint returns progress after this many
+    BATCH_SCHEDULER_ENABLED: bool = False
+    BATCH_SCHEDULER_INTERVAL_SECONDS: float = 3600.0
+
+    # --- Scheduled (standing-order) transfers ---
+    SCHEDULED_TRANSFER_ENABLED: bool = True
+    SCHEDULED_TRANSFER_INTERVAL_SECONDS: float = 30.0
+    SCHEDULED_TRANSFER_BATCH_SIZE: int = 500
+    SCHEDULED_TRANSFER_WORKERS: int = 1
+
+    # --- Outbound transaction-service client ---
+    # Optional endpoint accepting a JSON array of events in one request
+    TRANSACTION_SERVICE_BATCH_URL: Optional[str] = None
+    TRANSACTION_SERVICE_TIMEOUT_SECONDS: float = 2.0
+    TRANSACTION_SERVICE_POOL_CONNECTIONS: int = 4
+    TRANSACTION_SERVICE_POOL_MAXSIZE: int = 16
+    TRANSACTION_SERVICE_BREAKER_FAILURE_THRESHOLD: int = 5
+    TRANSACTION_SERVICE_BREAKER_RESET_SECONDS: float = 30.0
+
+    # --- Transaction outbox dispatcher ---
+    OUTBOX_DISPATCHER_ENABLED: bool = True
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 2.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 300.0
+
+    # --- Dashboard counters (bank_stats) ---
+    STATS_SHARDS: int = 8
+    STATS_RECONCILE_ENABLED: bool = True
+    STATS_RECONCILE_INTERVAL_SECONDS: float = 600.0
+
+    # --- Read caches for hot endpoints (single-flight + short TTL) ---
+    # None = in-process; "memory://" = shared-backend code path on an in-memory
+    # fake; otherwise a Redis URL (needs the 'redis' package)
+    CACHE_BACKEND_URL: Optional[str] = None
+    READ_CACHE_MAXSIZE: int = 10000
+    STATS_CACHE_TTL_SECONDS: float = 5.0
+    LOOKUP_CACHE_TTL_SECONDS: float = 30.0
+    LOOKUP_CACHE_MAXSIZE: int = 50000
+
+    # --- Account number allocation ---
+    # Key for the number permutation (defaults to JWT_SECRET_KEY). Changing it
+    # later is safe (the unique index catches clashes) but best avoided.
+    ACCOUNT_NUMBER_KEY: Optional[str] = None
+    ACCOUNT_NUMBER_BLOCK_SIZE: int = 100
     
     class Config:
         env_file = ".env"
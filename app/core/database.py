@@ -1,11 +1,31 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from .config import settings
+from .pool_metrics import PoolMetrics, InstrumentedQueuePool, InstrumentedAsyncQueuePool, track_connections
 
-engine = create_engine(settings.DATABASE_URL)
+def pool_options(async_mode: bool = False) -> dict:
+    """Engine keyword arguments for the pool configured in Settings."""
+    if settings.DB_POOL_MODE == "null":
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if async_mode else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(settings.DATABASE_URL, **pool_options())
+pool_metrics = InstrumentedQueuePool.metrics if settings.DB_POOL_MODE != "null" else PoolMetrics()
+track_connections(engine, pool_metrics)
+
+# expire_on_commit=False: rows returned by UPDATE ... RETURNING stay usable after
+# commit instead of being re-SELECTed when the response is serialized
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 # Dependency to get DB session
@@ -15,3 +35,31 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# --- Async mode (settings.DATABASE_ASYNC_MODE) ---
+def to_async_url(url: str) -> str:
+    """Swap a sync driver URL for its async counterpart (asyncpg / aiosqlite)."""
+    scheme, sep, rest = url.partition("://")
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if scheme in ("sqlite", "sqlite+pysqlite"):
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+# Only built when enabled, so the async drivers stay optional for sync deployments
+async_engine = None
+AsyncSessionLocal = None
+async_pool_metrics = None
+if settings.DATABASE_ASYNC_MODE:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL),
+        **pool_options(async_mode=True),
+    )
+    async_pool_metrics = InstrumentedAsyncQueuePool.metrics if settings.DB_POOL_MODE != "null" else PoolMetrics()
+    track_connections(async_engine.sync_engine, async_pool_metrics)
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,6 +1,13 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select, update, delete, case, or_, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.account import Account
-from app.models.transaction import Transaction
+from app.models.customer import Customer
+from app.models.scheduled_transfer import ScheduledTransfer
+from app.crud.stats import track_balance_changes
+from app.crud.transaction import detach_transactions
+from app.utils.account_numbers import account_numbers
 
 def create_account(db: Session, account: Account):
     db.add(account)
@@ -8,6 +15,39 @@ def create_account(db: Session, account: Account):
     db.refresh(account)
     return account
 
+# Numbers issued before the allocator existed were random, so a fresh number
+# can (rarely) clash with one of them; the unique index catches it and the
+# next number is tried.
+ACCOUNT_NUMBER_ATTEMPTS = 3
+ACCOUNT_NUMBER_INDEX = "ix_accounts_account_number"
+
+def is_account_number_clash(error: IntegrityError) -> bool:
+    """True only when the violated constraint is the account_number unique index."""
+    orig = error.orig
+    # psycopg2 reports the constraint in .diag, asyncpg as .constraint_name
+    constraint = getattr(getattr(orig, "diag", None), "constraint_name", None) or getattr(orig, "constraint_name", None)
+    if constraint:
+        return constraint == ACCOUNT_NUMBER_INDEX
+    # SQLite: "UNIQUE constraint failed: accounts.account_number"
+    return "UNIQUE" in str(orig) and "accounts.account_number" in str(orig)
+
+def open_account(db: Session, customer_id: int, account_type: str) -> Account:
+    for attempt in range(ACCOUNT_NUMBER_ATTEMPTS):
+        account = Account(
+            customer_id=customer_id,
+            account_type=account_type,
+            account_number=account_numbers.allocate_one(),
+            balance=0.0,
+        )
+        try:
+            return create_account(db, account)
+        except IntegrityError as e:
+            db.rollback()
+            # Anything else (e.g. the customer was just purged) will not go
+            # away with another number
+            if not is_account_number_clash(e) or attempt == ACCOUNT_NUMBER_ATTEMPTS - 1:
+                raise
+
 def get_accounts_by_customer(db: Session, customer_id: int):
     return db.query(Account).filter(Account.customer_id == customer_id).all()
 
@@ -18,18 +58,158 @@ def get_account_by_id(db: Session, account_id: int):
 def get_account_by_number(db: Session, account_number: str):
     return db.query(Account).filter(Account.account_number == account_number).first()
 
+# --- Owner lookup: one indexed join, only the columns the masked name needs ---
+def owner_initials_query(account_number: str):
+    return (
+        select(
+            Account.account_number,
+            func.substr(Customer.first_name, 1, 1).label("first_initial"),
+            func.substr(Customer.last_name, 1, 1).label("last_initial"),
+        )
+        .join(Customer, Customer.id == Account.customer_id)
+        .where(Account.account_number == account_number)
+    )
+
+def get_account_owner_initials(db: Session, account_number: str):
+    """(account_number, first_initial, last_initial) row, or None."""
+    return db.execute(owner_initials_query(account_number)).first()
+
 # --- NEW: Lock Row (For Safety) ---
 def get_account_for_update(db: Session, account_id: int):
     return db.query(Account).filter(Account.id == account_id).with_for_update().first()
 
-def update_balance(db: Session, account: Account, amount: float):
-    account.balance += amount
-    db.add(account)
+# --- Atomic balance changes (one round trip, no SELECT ... FOR UPDATE) ---
+# Both return the updated row, or None when no row matched. For debits a
+# miss means "not found (or not owned)" or "insufficient funds"; callers
+# only look closer on that failure path. Set-based UPDATEs skip mapper
+# events, so the dashboard counters are told about the change explicitly.
+def debit_balance(db: Session, account_id: int, amount: float, customer_id: Optional[int] = None) -> Optional[Account]:
+    stmt = update(Account).where(Account.id == account_id, Account.balance >= amount)
+    if customer_id is not None:
+        stmt = stmt.where(Account.customer_id == customer_id)
+    stmt = stmt.values(balance=Account.balance - amount).returning(Account)
+    account = db.scalars(stmt).first()
+    if account is not None:
+        track_balance_changes(db, [account], {account.id: -amount})
+    return account
+
+def credit_balance(db: Session, account_id: int, amount: float, customer_id: Optional[int] = None) -> Optional[Account]:
+    stmt = update(Account).where(Account.id == account_id)
+    if customer_id is not None:
+        stmt = stmt.where(Account.customer_id == customer_id)
+    stmt = stmt.values(balance=Account.balance + amount).returning(Account)
+    account = db.scalars(stmt).first()
+    if account is not None:
+        track_balance_changes(db, [account], {account.id: amount})
     return account
 
+# --- Transfer engine ---
+def lock_transfer_accounts(db: Session, from_account_id: int, to_account_numbers: List[str]) -> List[Account]:
+    """
+    Load and lock the source (by ID) and the targets (by account number).
+    Rows are locked in ID order, so concurrent transfers between the same
+    accounts cannot deadlock.
+    """
+    return lock_accounts(db, [from_account_id], to_account_numbers)
+
+# Keeps each CASE/IN list well under driver bind-parameter limits
+BALANCE_UPDATE_CHUNK_SIZE = 1000
+
+def lock_accounts(db: Session, account_ids: Sequence[int], numbers: Sequence[str]) -> List[Account]:
+    """
+    lock_transfer_accounts for several sources at once. Numbers are resolved
+    to IDs first (unlocked: account numbers never change), then rows are
+    locked with one SELECT ... FOR UPDATE per chunk of sorted IDs, so large
+    batches stay under bind limits and the global ID order still holds.
+    A small lock (the usual transfer) is a single statement.
+    """
+    numbers = list(numbers)
+    ids = set(account_ids)
+    if len(ids) + len(numbers) <= BALANCE_UPDATE_CHUNK_SIZE:
+        stmt = (
+            select(Account)
+            .where(or_(Account.id.in_(list(ids)), Account.account_number.in_(numbers)))
+            .order_by(Account.id)
+            .with_for_update()
+        )
+        return list(db.scalars(stmt))
+
+    for i in range(0, len(numbers), BALANCE_UPDATE_CHUNK_SIZE):
+        chunk = numbers[i:i + BALANCE_UPDATE_CHUNK_SIZE]
+        ids.update(db.scalars(select(Account.id).where(Account.account_number.in_(chunk))))
+    ordered = sorted(ids)
+    locked: List[Account] = []
+    for i in range(0, len(ordered), BALANCE_UPDATE_CHUNK_SIZE):
+        stmt = (
+            select(Account)
+            .where(Account.id.in_(ordered[i:i + BALANCE_UPDATE_CHUNK_SIZE]))
+            .order_by(Account.id)
+            .with_for_update()
+        )
+        locked.extend(db.scalars(stmt))
+    return locked
+
+def apply_balance_deltas(db: Session, deltas: Dict[int, float]) -> List[Account]:
+    """Apply {account_id: delta} with set-based UPDATEs and return the new rows."""
+    ids = sorted(deltas)
+    updated: List[Account] = []
+    for i in range(0, len(ids), BALANCE_UPDATE_CHUNK_SIZE):
+        chunk = {account_id: deltas[account_id] for account_id in ids[i:i + BALANCE_UPDATE_CHUNK_SIZE]}
+        stmt = (
+            update(Account)
+            .where(Account.id.in_(list(chunk)))
+            .values(balance=Account.balance + case(chunk, value=Account.id, else_=0.0))
+            .returning(Account)
+        )
+        updated.extend(db.scalars(stmt))
+    track_balance_changes(db, updated, deltas)
+    return updated
+
+def plan_transfer_legs(
+    source: Account,
+    targets: Dict[str, Account],
+    legs: Sequence[Tuple[str, float]],
+) -> Tuple[Dict[int, float], List[dict]]:
+    """
+    Validate (to_account_number, amount) legs against a locked source account.
+
+    Legs are checked in order against the source's running balance. Returns
+    the aggregated {account_id: delta} map for apply_balance_deltas plus one
+    result dict per leg ("applied" or "rejected" with a reason).
+    """
+    available = source.balance
+    deltas: Dict[int, float] = {}
+    results: List[dict] = []
+    for to_account_number, amount in legs:
+        target = targets.get(to_account_number)
+        detail = None
+        if amount <= 0:
+            detail = "Invalid amount"
+        elif not target:
+            detail = "Target account number not found"
+        elif target.id == source.id:
+            detail = "Cannot transfer to the same account"
+        elif amount > available:
+            detail = "Insufficient balance"
+
+        if detail:
+            results.append({"to_account_number": to_account_number, "amount": amount, "status": "rejected", "detail": detail})
+            continue
+
+        available -= amount
+        deltas[source.id] = deltas.get(source.id, 0.0) - amount
+        deltas[target.id] = deltas.get(target.id, 0.0) + amount
+        results.append({"to_account_number": to_account_number, "amount": amount, "status": "applied", "detail": None})
+    return deltas, results
+
 def delete_account(db: Session, account_id: int):
     account = get_account_by_id(db, account_id)
     if account:
+        # Standing orders go with the account, and go first: the executor
+        # locks orders before accounts, so this must not hold the account
+        # while waiting for one of its orders. Ledger rows are kept (detached)
+        db.execute(delete(ScheduledTransfer).where(ScheduledTransfer.from_account_id == account_id))
+        detach_transactions(db, [account_id])
         db.delete(account)
         db.commit()
         return True
@@ -20,6 +20,12 @@ def create_admin(db: Session, admin: AdminCreate):
     db.refresh(db_admin)
     return db_admin
 
+def update_admin_password(db: Session, admin: Admin, password_hash: str):
+    admin.password = password_hash
+    db.add(admin)
+    db.commit()
+    return admin
+
 def delete_admin(db: Session, admin_id: int):
     admin = get_admin(db, admin_id)
     if admin:
@@ -0,0 +1,22 @@
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.account import Account
+from app.crud.account import owner_initials_query
+
+# Async counterparts of app/crud/account.py for the async routes.
+# Multi-statement write paths are not duplicated here: the routes run the
+# sync versions through AsyncSession.run_sync, which executes them on the
+# async driver without a worker thread.
+
+async def get_accounts_by_customer(db: AsyncSession, customer_id: int) -> List[Account]:
+    result = await db.scalars(select(Account).where(Account.customer_id == customer_id))
+    return list(result)
+
+async def get_account_by_id(db: AsyncSession, account_id: int) -> Optional[Account]:
+    result = await db.scalars(select(Account).where(Account.id == account_id))
+    return result.first()
+
+async def get_account_owner_initials(db: AsyncSession, account_number: str):
+    result = await db.execute(owner_initials_query(account_number))
+    return result.first()
@@ -0,0 +1,10 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.customer import Customer
+
+# Async counterparts of app/crud/customer.py for the async routes
+
+async def get_customer_by_id(db: AsyncSession, customer_id: int) -> Optional[Customer]:
+    result = await db.scalars(select(Customer).where(Customer.id == customer_id))
+    return result.first()
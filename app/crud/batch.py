@@ -0,0 +1,141 @@
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.account import apply_balance_deltas
+from app.crud.transaction import record_transactions
+from app.models.account import Account
+from app.models.batch_run import BatchRun
+
+# --- Periodic balance processing ---
+# Accounts are walked in id order (keyset), one bounded transaction per chunk:
+# lock the chunk, compute the amounts from the rate tables, apply them with
+# one CASE-based UPDATE (apply_balance_deltas), bulk-write ledger + outbox
+# rows, advance the checkpoint, commit.
+
+JOBS = ("interest", "fee")
+LEDGER_TYPES = {"interest": "interest", "fee": "fee"}
+
+
+def rate_table(job: str) -> Dict[str, float]:
+    return settings.BATCH_INTEREST_RATES if job == "interest" else settings.BATCH_MAINTENANCE_FEES
+
+
+def plan_amounts(job: str, rows) -> Tuple[Dict[int, float], int]:
+    """
+    {account_id: signed delta} for a chunk of (id, account_type, balance)
+    rows, plus how many accounts were skipped (nothing to credit, or a fee
+    larger than the balance, which is waived rather than overdrawn).
+    """
+    rates = rate_table(job)
+    deltas: Dict[int, float] = {}
+    skipped = 0
+    for row in rows:
+        rate = rates[row.account_type]
+        if job == "interest":
+            amount = round(row.balance * rate, 2)
+            if amount > 0:
+                deltas[row.id] = amount
+                continue
+        elif 0 < rate <= row.balance:
+            deltas[row.id] = -rate
+            continue
+        skipped += 1
+    return deltas, skipped
+
+
+def _chunk_query(job: str, after_id: int, limit: int):
+    return (
+        select(Account.id, Account.account_type, Account.balance)
+        .where(
+            Account.id > after_id,
+            Account.account_type.in_(list(rate_table(job))),
+            Account.status == "active",
+        )
+        .order_by(Account.id)
+        .limit(limit)
+    )
+
+
+def _lock_run(db: Session, job: str, period: str) -> BatchRun:
+    stmt = select(BatchRun).where(BatchRun.job == job, BatchRun.period == period).with_for_update()
+    run = db.scalars(stmt).first()
+    if run is None:
+        db.add(BatchRun(job=job, period=period, status="running", last_account_id=0, accounts_processed=0, total_amount=0.0))
+        try:
+            db.flush()
+        except IntegrityError:
+            # Another runner created it first; queue behind its lock instead
+            db.rollback()
+        run = db.scalars(stmt).first()
+    return run
+
+
+def process_chunk(db: Session, job: str, period: str, chunk_size: int) -> Tuple[BatchRun, int]:
+    """
+    Apply the next chunk of ``job`` for ``period`` and commit. The run row is
+    locked for the chunk, so concurrent runners take turns instead of double
+    applying. Returns the run (status "completed" once past the last account)
+    and the number of accounts skipped in this chunk.
+    """
+    try:
+        run = _lock_run(db, job, period)
+        if run.status == "completed":
+            db.commit()
+            return run, 0
+
+        rows = db.execute(_chunk_query(job, run.last_account_id, chunk_size).with_for_update()).all()
+        deltas, skipped = plan_amounts(job, rows)
+        if deltas:
+            apply_balance_deltas(db, deltas)
+            details = f"{'Interest' if job == 'interest' else 'Maintenance fee'} {period}"
+            record_transactions(db, [
+                {"account_id": account_id, "type": LEDGER_TYPES[job], "amount": abs(delta), "details": details}
+                for account_id, delta in deltas.items()
+            ])
+
+        if rows:
+            run.last_account_id = rows[-1].id
+        run.accounts_processed += len(deltas)
+        run.total_amount = round(run.total_amount + sum(abs(delta) for delta in deltas.values()), 2)
+        if len(rows) < chunk_size:
+            run.status = "completed"
+            run.completed_at = datetime.utcnow()
+        db.commit()
+        return run, skipped
+    except Exception:
+        db.rollback()
+        raise
+
+
+def preview_job(db: Session, job: str, chunk_size: int, after_id: int = 0) -> dict:
+    """
+    Dry run: the same keyset walk and arithmetic, without locks or writes.
+    ``after_id`` is the checkpoint of a partly processed run, so only what
+    is left to apply is counted.
+    """
+    accounts = skipped = 0
+    total = 0.0
+    by_type: Dict[str, dict] = {}
+    while True:
+        rows = db.execute(_chunk_query(job, after_id, chunk_size)).all()
+        deltas, chunk_skipped = plan_amounts(job, rows)
+        skipped += chunk_skipped
+        types = {row.id: row.account_type for row in rows}
+        for account_id, delta in deltas.items():
+            entry = by_type.setdefault(types[account_id], {"accounts": 0, "amount": 0.0})
+            entry["accounts"] += 1
+            entry["amount"] = round(entry["amount"] + abs(delta), 2)
+        accounts += len(deltas)
+        total = round(total + sum(abs(delta) for delta in deltas.values()), 2)
+        if len(rows) < chunk_size:
+            return {"accounts": accounts, "total_amount": total, "skipped": skipped, "by_type": by_type}
+        after_id = rows[-1].id
+
+
+def get_batch_run(db: Session, job: str, period: str) -> Optional[BatchRun]:
+    return db.get(BatchRun, (job, period))
@@ -1,7 +1,17 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_ # <--- Import this
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, exists, insert, select, tuple_
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
 from app.models.customer import Customer
-from app.models.account import Account # <--- Import Account for joining
+from app.models.account import Account
+from app.models.search import CustomerSearchGram
+from app.models.scheduled_transfer import ScheduledTransfer
+from app.crud import search, stats
+from app.crud.transaction import detach_transactions, record_transactions
+from app.utils.account_numbers import account_numbers
+from app.utils.principal import queue_principal_invalidations
+from app.utils.read_cache import queue_lookup_invalidations
 
 def create_customer(db: Session, customer: Customer):
     db.add(customer)
@@ -15,6 +25,61 @@ def get_customer_by_email(db: Session, email: str):
 def get_customer_by_id(db: Session, customer_id: int):
     return db.query(Customer).filter(Customer.id == customer_id).first()
 
+# --- Eager-loading variants (for responses that include accounts) ---
+# Customer.accounts is lazy: serializing CustomerResponse from a plain query
+# costs one extra SELECT per customer. The functions above stay lightweight
+# (no accounts) for auth and other callers that never touch the relationship.
+def get_customer_with_accounts(db: Session, customer_id: int):
+    # Single row: one joined query
+    return (
+        db.query(Customer)
+        .options(joinedload(Customer.accounts))
+        .filter(Customer.id == customer_id)
+        .first()
+    )
+
+def get_customers_page(
+    db: Session,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+    status: Optional[str] = None,
+    account_type: Optional[str] = None,
+    min_balance: Optional[float] = None,
+    max_balance: Optional[float] = None,
+    with_accounts: bool = True,
+) -> List[Customer]:
+    """
+    Newest-first page; ``after`` is the (created_at, id) of the previous page's
+    last row, so every page is an index range scan regardless of depth.
+    Account filters match customers having at least one account that
+    satisfies all of them.
+    """
+    stmt = select(Customer)
+    if status:
+        stmt = stmt.where(Customer.status == status)
+    if account_type or min_balance is not None or max_balance is not None:
+        account_filter = [Account.customer_id == Customer.id]
+        if account_type:
+            account_filter.append(Account.account_type == account_type)
+        if min_balance is not None:
+            account_filter.append(Account.balance >= min_balance)
+        if max_balance is not None:
+            account_filter.append(Account.balance <= max_balance)
+        stmt = stmt.where(exists().where(*account_filter))
+    if after:
+        stmt = stmt.where(tuple_(Customer.created_at, Customer.id) < tuple_(*after))
+    stmt = stmt.order_by(Customer.created_at.desc(), Customer.id.desc()).limit(limit)
+    # Many rows: selectinload keeps it at two queries for the whole page
+    if with_accounts:
+        stmt = stmt.options(selectinload(Customer.accounts))
+    return list(db.scalars(stmt))
+
+def update_customer_password_hash(db: Session, customer: Customer, password_hash: str):
+    customer.password_hash = password_hash
+    db.add(customer)
+    db.commit()
+    return customer
+
 def delete_customer(db: Session, customer_id: int):
     customer = get_customer_by_id(db, customer_id)
     if customer:
@@ -23,14 +88,158 @@ def delete_customer(db: Session, customer_id: int):
         return True
     return False
 
-# --- NEW: Server-Side Search Logic ---
-def search_customers(db: Session, query: str):
-    search_term = f"%{query}%"
-    return db.query(Customer).outerjoin(Customer.accounts).filter(
-        or_(
-            Customer.first_name.ilike(search_term),
-            Customer.last_name.ilike(search_term),
-            Customer.email.ilike(search_term),
-            Account.account_number.ilike(search_term)
-        )
-    ).distinct().all() # .distinct() prevents duplicates if multiple accounts match
\ No newline at end of file
+# --- Bulk import ---
+def existing_emails(db: Session, emails: List[str]) -> Set[str]:
+    """One IN query for a whole chunk of candidate emails."""
+    if not emails:
+        return set()
+    return set(db.scalars(select(Customer.email).where(Customer.email.in_(emails))))
+
+def bulk_create_customers(db: Session, rows: List[dict]) -> Tuple[int, int]:
+    """
+    Insert a chunk of customers, plus one account each where ``account_type``
+    is set, with one bulk INSERT per table and account numbers from a single
+    block allocation. Opening balances get a ledger entry. Bulk inserts skip
+    mapper events, so counters and the search index are updated here.
+    Commits; returns (customers, accounts) inserted.
+    """
+    if not rows:
+        return 0, 0
+    # Reserve numbers before writing anything: the allocator uses its own
+    # short transaction, which must not queue behind this one
+    numbers = iter(account_numbers.allocate(sum(1 for row in rows if row.get("account_type"))))
+    now = datetime.utcnow()
+    customer_ids = db.scalars(
+        insert(Customer).returning(Customer.id, sort_by_parameter_order=True),
+        [
+            {
+                "first_name": row["first_name"],
+                "last_name": row["last_name"],
+                "email": row["email"],
+                "phone_number": row["phone_number"],
+                "password_hash": row["password_hash"],
+                "status": "active",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for row in rows
+        ],
+    ).all()
+
+    opening = [(customer_id, row) for customer_id, row in zip(customer_ids, rows) if row.get("account_type")]
+    account_ids: List[int] = []
+    if opening:
+        account_ids = db.scalars(
+            insert(Account).returning(Account.id, sort_by_parameter_order=True),
+            [
+                {
+                    "customer_id": customer_id,
+                    "account_type": row["account_type"],
+                    "account_number": number,
+                    "balance": row["opening_balance"],
+                    "status": "active",
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for (customer_id, row), number in zip(opening, numbers)
+            ],
+        ).all()
+        record_transactions(db, [
+            {"account_id": account_id, "type": "deposit", "amount": row["opening_balance"], "details": "Opening balance (import)"}
+            for account_id, (_, row) in zip(account_ids, opening)
+            if row["opening_balance"] > 0
+        ])
+
+    stats.track(db, stats.customer_scopes("active"), len(customer_ids))
+    for _, row in opening:
+        stats.track(db, stats.account_scopes(row["account_type"], "active"), 1, row["opening_balance"])
+    search.reindex_customers(db.connection(), customer_ids)
+
+    db.commit()
+    return len(customer_ids), len(account_ids)
+
+# --- Bulk purge (offboarding) ---
+# Set-based deletes run without the ORM, so the mapper-event bookkeeping
+# (dashboard counters, principal and lookup caches) is done by hand here.
+def purge_customers(db: Session, customer_ids: List[int]) -> Tuple[List[int], Dict[int, str]]:
+    """
+    Delete customers with their accounts and search index rows in one
+    transaction; their ledger rows are kept, detached. Customers with funds
+    in any account are left as they are. Returns (deleted ids,
+    {funded customer id: type of a funded account}).
+    """
+    ids = sorted(set(customer_ids))
+    if not ids:
+        return [], {}
+
+    # Lock the customers, their standing orders, then their accounts (ID
+    # order): no account or order can be added (the FK checks lock the
+    # customer row) and no balance can move, so the funded check below
+    # matches what the guarded DELETEs will see. Orders before accounts, as
+    # the scheduled-transfer executor takes them, so the two cannot deadlock
+    db.execute(select(Customer.id).where(Customer.id.in_(ids)).order_by(Customer.id).with_for_update())
+    db.execute(
+        select(ScheduledTransfer.id)
+        .where(ScheduledTransfer.customer_id.in_(ids))
+        .order_by(ScheduledTransfer.id)
+        .with_for_update()
+    )
+    locked = db.execute(
+        select(Account.id, Account.customer_id, Account.account_type, Account.balance)
+        .where(Account.customer_id.in_(ids))
+        .order_by(Account.id)
+        .with_for_update()
+    ).all()
+    funded: Dict[int, str] = {}
+    for row in locked:
+        if row.balance > 0:
+            funded.setdefault(row.customer_id, row.account_type)
+
+    sibling = aliased(Account)
+    unfunded = ~exists().where(sibling.customer_id == Account.customer_id, sibling.balance > 0)
+    no_accounts = ~exists().where(Account.customer_id == Customer.id)
+    bulk = {"synchronize_session": False}
+
+    # The ledger is kept for statements and reconciliation, detached from
+    # the accounts being removed
+    detach_transactions(db, select(Account.id).where(Account.customer_id.in_(ids), unfunded))
+    db.execute(
+        delete(ScheduledTransfer).where(
+            ScheduledTransfer.customer_id.in_(ids),
+            ~exists().where(Account.customer_id == ScheduledTransfer.customer_id, Account.balance > 0),
+        ),
+        execution_options=bulk,
+    )
+    removed_accounts = db.execute(
+        delete(Account)
+        .where(Account.customer_id.in_(ids), unfunded)
+        .returning(Account.account_number, Account.account_type, Account.status, Account.balance),
+        execution_options=bulk,
+    ).all()
+    db.execute(
+        delete(CustomerSearchGram).where(
+            CustomerSearchGram.customer_id.in_(ids),
+            ~exists().where(Account.customer_id == CustomerSearchGram.customer_id),
+        ),
+        execution_options=bulk,
+    )
+    removed_customers = db.execute(
+        delete(Customer).where(Customer.id.in_(ids), no_accounts).returning(Customer.id, Customer.status),
+        execution_options=bulk,
+    ).all()
+
+    for row in removed_accounts:
+        stats.track(db, stats.account_scopes(row.account_type, row.status), -1, -(row.balance or 0.0))
+    for row in removed_customers:
+        stats.track(db, stats.customer_scopes(row.status), -1)
+    queue_principal_invalidations(db, "customer", [row.id for row in removed_customers])
+    queue_lookup_invalidations(db, [row.account_number for row in removed_accounts])
+
+    db.commit()
+    return sorted(row.id for row in removed_customers), funded
+
+# --- Server-Side Search Logic ---
+# Indexed search lives in app/crud/search.py (trigram / n-gram indexes plus
+# exact fast paths); this keeps the original entry point.
+def search_customers(db: Session, query: str, limit: int = 50, offset: int = 0, with_accounts: bool = True):
+    return search.search_customers(db, query, limit=limit, offset=offset, with_accounts=with_accounts)
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from app.models.idempotency_key import IdempotencyKey
+
+# NOTE: insert_key never commits; the row joins the caller's transaction.
+def insert_key(db: Session, scope: str, key: str, fingerprint: str, expires_at: datetime) -> IdempotencyKey:
+    # Flushed right away: the primary key makes a concurrent request with
+    # the same key wait here (and then fail) before it touches any account
+    row = IdempotencyKey(scope=scope, key=key, fingerprint=fingerprint, expires_at=expires_at)
+    db.add(row)
+    db.flush()
+    return row
+
+def get_key(db: Session, scope: str, key: str) -> Optional[IdempotencyKey]:
+    return db.get(IdempotencyKey, (scope, key))
+
+def delete_expired_key(db: Session, scope: str, key: str):
+    db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key,
+        IdempotencyKey.expires_at <= datetime.utcnow(),
+    ))
+
+def purge_expired_keys(db: Session) -> int:
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+    db.commit()
+    return result.rowcount
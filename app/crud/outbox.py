@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import select, delete, insert
+from sqlalchemy.orm import Session
+from app.models.outbox import OutboxEvent
+
+# NOTE: The enqueue helpers never commit. The caller commits them together
+# with the balance change so an event exists if and only if the change does.
+def enqueue_event(db: Session, payload: dict):
+    event = OutboxEvent(payload=payload)
+    db.add(event)
+    return event
+
+def enqueue_events(db: Session, payloads: List[dict]):
+    if payloads:
+        db.execute(insert(OutboxEvent), [{"payload": payload} for payload in payloads])
+
+# --- Dispatcher side ---
+def claim_pending_events(db: Session, limit: int) -> List[OutboxEvent]:
+    # SKIP LOCKED lets several dispatchers drain the table without
+    # delivering the same row twice (ignored on SQLite, which has no row locks)
+    stmt = (
+        select(OutboxEvent)
+        .where(OutboxEvent.status == "pending", OutboxEvent.next_attempt_at <= datetime.utcnow())
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list(db.scalars(stmt))
+
+def delete_events(db: Session, event_ids: List[int]):
+    if event_ids:
+        db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(event_ids)))
+
+def mark_failed(
+    db: Session,
+    event: OutboxEvent,
+    error: str,
+    max_attempts: int,
+    backoff_base: float,
+    backoff_max: float,
+):
+    event.attempts += 1
+    event.last_error = error[:500]
+    if event.attempts >= max_attempts:
+        event.status = "dead"
+    else:
+        delay = min(backoff_base * (2 ** (event.attempts - 1)), backoff_max)
+        event.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+    db.add(event)
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+from app.models.revoked_token import RevokedToken
+
+def revoke_token(db: Session, jti: str, expires_at: datetime):
+    # The primary key makes a second revocation of the same jti fail, which
+    # is what turns concurrent use of one refresh token into a single winner
+    db.add(RevokedToken(jti=jti, expires_at=expires_at))
+    db.commit()
+
+def get_active_revocations(db: Session) -> List[RevokedToken]:
+    return list(db.scalars(select(RevokedToken).where(RevokedToken.expires_at > datetime.utcnow())))
+
+def get_revocations_since(db: Session, since: datetime) -> List[RevokedToken]:
+    return list(db.scalars(select(RevokedToken).where(RevokedToken.revoked_at >= since)))
+
+def purge_expired_revocations(db: Session):
+    # An expired token fails signature checks anyway, so its jti can go
+    db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    db.commit()
@@ -0,0 +1,217 @@
+import calendar
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.scheduled_transfer import ScheduledTransfer
+from app.crud.account import apply_balance_deltas, lock_accounts, plan_transfer_legs
+from app.crud.transaction import record_transactions
+
+_FIXED_PERIODS = {"daily": timedelta(days=1), "weekly": timedelta(weeks=1)}
+
+# A rejected occurrence of a recurring order is skipped (the next one may
+# succeed); anything else cannot succeed later, so the order stops
+_RETRYABLE = {"Insufficient balance"}
+
+
+# --- Schedule arithmetic ---
+def _add_months(moment: datetime, months: int) -> datetime:
+    month_index = moment.month - 1 + months
+    year, month = moment.year + month_index // 12, month_index % 12 + 1
+    # Clamp to the month's last day (Jan 31 -> Feb 28 -> Mar 31)
+    day = min(moment.day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day)
+
+
+def occurrence(start_at: datetime, frequency: str, index: int) -> datetime:
+    if frequency == "monthly":
+        return _add_months(start_at, index)
+    return start_at + _FIXED_PERIODS[frequency] * index
+
+
+def _first_index_after(start_at: datetime, frequency: str, now: datetime) -> int:
+    """Index of the first occurrence strictly after ``now``."""
+    if start_at > now:
+        return 0
+    if frequency in _FIXED_PERIODS:
+        return (now - start_at) // _FIXED_PERIODS[frequency] + 1
+    index = (now.year - start_at.year) * 12 + now.month - start_at.month
+    while occurrence(start_at, frequency, index) <= now:
+        index += 1
+    return index
+
+
+def _advance(item: ScheduledTransfer, now: datetime):
+    """Move to the next occurrence; ones missed while the executor was down are skipped."""
+    if item.frequency == "once":
+        item.runs += 1
+        item.status = "completed"
+        return
+    item.runs = max(item.runs + 1, _first_index_after(item.start_at, item.frequency, now))
+    item.next_run_at = occurrence(item.start_at, item.frequency, item.runs)
+
+
+# --- Customer-facing CRUD ---
+def create_scheduled_transfer(
+    db: Session,
+    customer_id: int,
+    from_account_id: int,
+    to_account_number: str,
+    amount: float,
+    frequency: str,
+    start_at: Optional[datetime] = None,
+) -> ScheduledTransfer:
+    start_at = start_at or datetime.utcnow()
+    item = ScheduledTransfer(
+        customer_id=customer_id,
+        from_account_id=from_account_id,
+        to_account_number=to_account_number,
+        amount=amount,
+        frequency=frequency,
+        start_at=start_at,
+        next_run_at=start_at,
+        runs=0,
+        status="active",
+    )
+    db.add(item)
+    db.commit()
+    db.refresh(item)
+    return item
+
+
+def get_scheduled_transfers(db: Session, customer_id: int) -> List[ScheduledTransfer]:
+    stmt = (
+        select(ScheduledTransfer)
+        .where(ScheduledTransfer.customer_id == customer_id)
+        .order_by(ScheduledTransfer.id)
+    )
+    return list(db.scalars(stmt))
+
+
+def get_scheduled_transfer(db: Session, customer_id: int, transfer_id: int) -> Optional[ScheduledTransfer]:
+    item = db.get(ScheduledTransfer, transfer_id)
+    if item is None or item.customer_id != customer_id:
+        return None
+    return item
+
+
+def update_scheduled_transfer(
+    db: Session,
+    item: ScheduledTransfer,
+    amount: Optional[float] = None,
+    status: Optional[str] = None,
+) -> ScheduledTransfer:
+    if amount is not None:
+        item.amount = amount
+    if status == "active" and item.status == "paused":
+        # Resuming does not replay the occurrences that fell into the pause
+        now = datetime.utcnow()
+        if item.frequency != "once" and item.next_run_at <= now:
+            item.runs = _first_index_after(item.start_at, item.frequency, now)
+            item.next_run_at = occurrence(item.start_at, item.frequency, item.runs)
+        item.status = "active"
+    elif status == "paused" and item.status == "active":
+        item.status = "paused"
+    db.commit()
+    db.refresh(item)
+    return item
+
+
+def cancel_scheduled_transfer(db: Session, item: ScheduledTransfer) -> ScheduledTransfer:
+    item.status = "cancelled"
+    db.commit()
+    return item
+
+
+# --- Executor side ---
+def claim_due_transfers(db: Session, limit: int, now: datetime) -> List[ScheduledTransfer]:
+    # Served by ix_scheduled_transfers_status_next_run_at. SKIP LOCKED lets
+    # several executors split the due set; a claimed row stays locked until
+    # its batch commits, so no order runs twice for the same occurrence
+    stmt = (
+        select(ScheduledTransfer)
+        .where(ScheduledTransfer.status == "active", ScheduledTransfer.next_run_at <= now)
+        .order_by(ScheduledTransfer.next_run_at, ScheduledTransfer.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list(db.scalars(stmt))
+
+
+def execute_due_batch(db: Session, limit: int, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Claim up to ``limit`` due orders and run them in one transaction: every
+    involved account is locked by a single statement (so each source once,
+    whatever its number of orders), each source's orders are validated in
+    due order by plan_transfer_legs, then all legs are applied with
+    set-based updates and bulk ledger writes. Commits; returns counts.
+    """
+    now = now or datetime.utcnow()
+    try:
+        items = claim_due_transfers(db, limit, now)
+        if not items:
+            db.commit()
+            return {"claimed": 0, "applied": 0, "rejected": 0}
+
+        by_source: Dict[int, List[ScheduledTransfer]] = {}
+        for item in items:
+            by_source.setdefault(item.from_account_id, []).append(item)
+
+        locked = lock_accounts(db, list(by_source), list({item.to_account_number for item in items}))
+        accounts_by_id = {a.id: a for a in locked}
+        targets = {a.account_number: a for a in locked}
+
+        deltas: Dict[int, float] = {}
+        entries: List[dict] = []
+        applied = 0
+        for source_id, group in by_source.items():
+            source = accounts_by_id.get(source_id)
+            if source is None or any(item.customer_id != source.customer_id for item in group):
+                for item in group:
+                    _settle(item, "Source account not found", now)
+                continue
+
+            # Credits received in this batch are not spendable until the next
+            # one: each source is checked against its locked balance only
+            source_deltas, results = plan_transfer_legs(source, targets, [(i.to_account_number, i.amount) for i in group])
+            for account_id, delta in source_deltas.items():
+                deltas[account_id] = deltas.get(account_id, 0.0) + delta
+            for item, result in zip(group, results):
+                _settle(item, result["detail"], now)
+                if result["status"] != "applied":
+                    continue
+                applied += 1
+                target = targets[item.to_account_number]
+                entries.append({
+                    "account_id": source.id,
+                    "type": "transfer",
+                    "amount": item.amount,
+                    "details": f"To Acc: {target.account_number} (standing order #{item.id})"
+                })
+                entries.append({
+                    "account_id": target.id,
+                    "type": "deposit",
+                    "amount": item.amount,
+                    "details": f"From Acc: {source.account_number} (standing order #{item.id})"
+                })
+
+        if deltas:
+            apply_balance_deltas(db, deltas)
+        record_transactions(db, entries)
+        db.commit()
+        return {"claimed": len(items), "applied": applied, "rejected": len(items) - applied}
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _settle(item: ScheduledTransfer, error: Optional[str], now: datetime):
+    item.last_run_at = now
+    item.last_result = "rejected" if error else "applied"
+    item.last_error = error
+    if error and (item.frequency == "once" or error not in _RETRYABLE):
+        item.status = "failed"
+    else:
+        _advance(item, now)
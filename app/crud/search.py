@@ -0,0 +1,211 @@
+from typing import Iterable, List, Set
+
+from sqlalchemy import and_, delete, event, exists, func, insert, inspect, literal_column, or_, select, case, text, union
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.account import Account
+from app.models.customer import Customer
+from app.models.search import CustomerSearchGram
+
+# --- Customer search ---
+# Postgres: pg_trgm GIN indexes over the customer "document" and account numbers.
+# Others:   the customer_search_grams table, kept in sync by the mapper events below.
+# Both:     exact fast paths for 9-digit account numbers and email prefixes.
+
+GRAM_SIZE = 3
+
+# Must match the indexed expression exactly, so the separator is a literal
+SPACE = literal_column("' '")
+SEARCH_DOCUMENT = Customer.first_name + SPACE + Customer.last_name + SPACE + Customer.email
+EMAIL_LOWER = func.lower(Customer.email)  # Same expression as ix_customers_email_lower
+
+POSTGRES_SEARCH_DDL = [
+    # Also declared on the model; repeated for tables that predate it
+    "CREATE INDEX IF NOT EXISTS ix_customers_email_lower ON customers (lower(email) text_pattern_ops)",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_customers_search_trgm ON customers "
+    "USING gin ((first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_accounts_account_number_trgm ON accounts "
+    "USING gin (account_number gin_trgm_ops)",
+]
+
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# --- n-gram maintenance (non-Postgres) ---
+def document_grams(text_value: str) -> Set[str]:
+    """
+    Trigrams of ``text_value`` (lower-cased). Two trailing pad characters make
+    every substring of length 1-3 the prefix of some gram, so short queries
+    can use a prefix range scan.
+    """
+    padded = text_value.lower() + "  "
+    return {padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)}
+
+
+def query_grams(query: str) -> Set[str]:
+    lowered = query.lower()
+    return {lowered[i:i + GRAM_SIZE] for i in range(len(lowered) - GRAM_SIZE + 1)}
+
+
+def reindex_customers(connection: Connection, customer_ids: Iterable[int]):
+    """Rebuild the n-gram rows of the given customers (no-op on Postgres)."""
+    customer_ids = list(customer_ids)
+    if not customer_ids or _is_postgres(connection):
+        return
+    grams = {
+        row.id: document_grams(f"{row.first_name} {row.last_name} {row.email}")
+        for row in connection.execute(
+            select(Customer.id, Customer.first_name, Customer.last_name, Customer.email)
+            .where(Customer.id.in_(customer_ids))
+        )
+    }
+    numbers = connection.execute(
+        select(Account.customer_id, Account.account_number).where(Account.customer_id.in_(customer_ids))
+    )
+    for customer_id, account_number in numbers:
+        if customer_id in grams:
+            grams[customer_id] |= document_grams(account_number)
+
+    connection.execute(delete(CustomerSearchGram).where(CustomerSearchGram.customer_id.in_(customer_ids)))
+    rows = [{"gram": gram, "customer_id": customer_id} for customer_id, gs in grams.items() for gram in gs]
+    if rows:
+        connection.execute(insert(CustomerSearchGram), rows)
+
+
+def remove_customers_from_index(connection: Connection, customer_ids: Iterable[int]):
+    customer_ids = list(customer_ids)
+    if customer_ids and not _is_postgres(connection):
+        connection.execute(delete(CustomerSearchGram).where(CustomerSearchGram.customer_id.in_(customer_ids)))
+
+
+@event.listens_for(Customer, "after_insert")
+def _customer_inserted(mapper, connection, target):
+    reindex_customers(connection, [target.id])
+
+
+@event.listens_for(Customer, "after_update")
+def _customer_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("first_name", "last_name", "email")):
+        reindex_customers(connection, [target.id])
+
+
+@event.listens_for(Customer, "before_delete")
+def _customer_deleted(mapper, connection, target):
+    remove_customers_from_index(connection, [target.id])
+
+
+@event.listens_for(Account, "after_insert")
+@event.listens_for(Account, "after_delete")
+def _account_changed(mapper, connection, target):
+    reindex_customers(connection, [target.customer_id])
+
+
+def setup_search(db: Session):
+    """Startup hook: trigram indexes on Postgres, one-off n-gram backfill elsewhere."""
+    if _is_postgres(db.get_bind()):
+        for ddl in POSTGRES_SEARCH_DDL:
+            db.execute(text(ddl))
+    elif not db.scalar(select(func.count()).select_from(CustomerSearchGram)):
+        ids = list(db.scalars(select(Customer.id)))
+        for i in range(0, len(ids), 1000):
+            reindex_customers(db.connection(), ids[i:i + 1000])
+    db.commit()
+
+
+# --- Query side ---
+def search_customers(
+    db: Session, query: str, limit: int = 50, offset: int = 0, with_accounts: bool = True
+) -> List[Customer]:
+    q = query.strip()
+    if not q:
+        return []
+
+    def run(stmt):
+        # Accounts are loaded for the whole page in one extra query (no N+1)
+        if with_accounts:
+            stmt = stmt.options(selectinload(Customer.accounts))
+        return list(db.scalars(stmt.limit(limit).offset(offset)))
+
+    # Fast path 1: a full account number is a unique-index lookup
+    if len(q) == 9 and q.isdigit():
+        stmt = (
+            select(Customer)
+            .join(Account, Account.customer_id == Customer.id)
+            .where(Account.account_number == q)
+        )
+        return run(stmt)
+
+    # Fast path 2: anything with "@" is a case-insensitive email prefix, an
+    # index range scan on ix_customers_email_lower
+    if "@" in q:
+        prefix = q.lower()
+        if _is_postgres(db.get_bind()):
+            # text_pattern_ops index: LIKE 'prefix%' is planned as a range
+            match = EMAIL_LOWER.like(_escape_like(prefix) + "%", escape="\\")
+        else:
+            match = and_(EMAIL_LOWER >= prefix, EMAIL_LOWER < prefix + "\uffff")
+        stmt = select(Customer).where(match).order_by(EMAIL_LOWER)
+        return run(stmt)
+
+    lowered = q.lower()
+    pattern = f"%{_escape_like(q)}%"
+
+    # Exact email, then name prefix, then any substring match
+    rank = case(
+        (func.lower(Customer.email) == lowered, 0),
+        (or_(
+            func.lower(Customer.first_name).startswith(lowered, autoescape=True),
+            func.lower(Customer.last_name).startswith(lowered, autoescape=True),
+        ), 1),
+        else_=2,
+    )
+
+    if _is_postgres(db.get_bind()):
+        # Each branch is a GIN bitmap scan; the union is the (small) match set
+        hits = [select(Customer.id.label("customer_id")).where(SEARCH_DOCUMENT.ilike(pattern, escape="\\"))]
+        if any(ch.isdigit() for ch in q):
+            hits.append(select(Account.customer_id).where(Account.account_number.like(pattern, escape="\\")))
+        matched = union(*hits).subquery()
+        stmt = (
+            select(Customer)
+            .join(matched, matched.c.customer_id == Customer.id)
+            .order_by(rank, func.similarity(SEARCH_DOCUMENT, q).desc(), Customer.id)
+        )
+    else:
+        # Candidates must contain every trigram of the query; shorter queries
+        # match gram prefixes instead. Candidates are then verified exactly.
+        grams = query_grams(q)
+        if grams:
+            candidates = (
+                select(CustomerSearchGram.customer_id)
+                .where(CustomerSearchGram.gram.in_(grams))
+                .group_by(CustomerSearchGram.customer_id)
+                .having(func.count() == len(grams))
+            )
+        else:
+            candidates = (
+                select(CustomerSearchGram.customer_id)
+                .where(CustomerSearchGram.gram >= lowered, CustomerSearchGram.gram < lowered + "\uffff")
+                .distinct()
+            )
+        account_match = exists().where(
+            Account.customer_id == Customer.id,
+            Account.account_number.like(pattern, escape="\\"),
+        )
+        stmt = (
+            select(Customer)
+            .where(Customer.id.in_(candidates))
+            .where(or_(SEARCH_DOCUMENT.ilike(pattern, escape="\\"), account_match))
+            .order_by(rank, Customer.id)
+        )
+
+    return run(stmt)
@@ -0,0 +1,247 @@
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, insert, inspect, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.account import Account
+from app.models.bank_stats import BankStat
+from app.models.counter import Counter
+from app.models.customer import Customer
+
+# --- Dashboard counters ---
+# Changes are accumulated per session and written at commit as one upsert,
+# inside the same transaction, to a randomly chosen shard. Writing once and
+# in scope order keeps the stats rows locked only for the commit itself.
+
+CUSTOMERS = "customers"
+ACCOUNTS = "accounts"
+
+# Balances are floats; smaller differences are rounding, not drift
+BALANCE_TOLERANCE = 1e-6
+
+# Counter row whose lock serializes reconciliation (and the first-boot count)
+RECONCILE_LOCK = "stats_reconcile"
+
+
+def customer_scopes(status: Optional[str]) -> List[str]:
+    return [CUSTOMERS, f"customers:status:{status or ''}"]
+
+
+def account_scopes(account_type: Optional[str], status: Optional[str]) -> List[str]:
+    return [ACCOUNTS, f"accounts:type:{account_type or ''}", f"accounts:status:{status or ''}"]
+
+
+def track(db: Session, scopes: Iterable[str], count: int = 0, balance: float = 0.0):
+    """Queue a change to be written when ``db`` commits."""
+    pending: Dict[str, List] = db.info.setdefault("stats_deltas", {})
+    for scope in scopes:
+        delta = pending.setdefault(scope, [0, 0.0])
+        delta[0] += count
+        delta[1] += balance
+
+
+def track_balance_changes(db: Session, accounts: Iterable[Account], deltas: Dict[int, float]):
+    """For set-based balance UPDATEs (which bypass mapper events)."""
+    for account in accounts:
+        track(db, account_scopes(account.account_type, account.status), balance=deltas[account.id])
+
+
+def _upsert(db: Session, rows: List[dict]):
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(BankStat).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BankStat.scope, BankStat.shard],
+            set_={
+                "count": BankStat.count + stmt.excluded.count,
+                "balance": BankStat.balance + stmt.excluded.balance,
+            },
+        )
+        db.execute(stmt)
+        return
+    for row in rows:
+        updated = db.execute(
+            update(BankStat)
+            .where(BankStat.scope == row["scope"], BankStat.shard == row["shard"])
+            .values(count=BankStat.count + row["count"], balance=BankStat.balance + row["balance"])
+        ).rowcount
+        if not updated:
+            db.execute(insert(BankStat).values(row))
+
+
+def apply_deltas(db: Session, deltas: Dict[str, Tuple[int, float]], shard: Optional[int] = None):
+    if shard is None:
+        shard = random.randrange(settings.STATS_SHARDS)
+    rows = [
+        {"scope": scope, "shard": shard, "count": count, "balance": balance}
+        for scope, (count, balance) in sorted(deltas.items())
+        if count or abs(balance) > BALANCE_TOLERANCE
+    ]
+    if rows:
+        _upsert(db, rows)
+
+
+# --- Tracking ORM inserts / deletes / updates ---
+def _track_target(target, scopes: List[str], count: int, balance: float = 0.0):
+    session = object_session(target)
+    if session is not None:
+        track(session, scopes, count, balance)
+
+
+def _previous(state, name: str):
+    history = state.attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(state.object, name)
+
+
+@event.listens_for(Customer, "after_insert")
+def _customer_inserted(mapper, connection, target):
+    _track_target(target, customer_scopes(target.status), 1)
+
+
+@event.listens_for(Customer, "after_delete")
+def _customer_deleted(mapper, connection, target):
+    _track_target(target, customer_scopes(target.status), -1)
+
+
+@event.listens_for(Customer, "after_update")
+def _customer_updated(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.status.history.has_changes():
+        _track_target(target, customer_scopes(_previous(state, "status")), -1)
+        _track_target(target, customer_scopes(target.status), 1)
+
+
+@event.listens_for(Account, "after_insert")
+def _account_inserted(mapper, connection, target):
+    _track_target(target, account_scopes(target.account_type, target.status), 1, target.balance or 0.0)
+
+
+@event.listens_for(Account, "after_delete")
+def _account_deleted(mapper, connection, target):
+    _track_target(target, account_scopes(target.account_type, target.status), -1, -(target.balance or 0.0))
+
+
+@event.listens_for(Account, "after_update")
+def _account_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("balance", "status", "account_type")):
+        old = account_scopes(_previous(state, "account_type"), _previous(state, "status"))
+        _track_target(target, old, -1, -(_previous(state, "balance") or 0.0))
+        _track_target(target, account_scopes(target.account_type, target.status), 1, target.balance or 0.0)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_deltas(session):
+    # Flush first so mapper events from the final flush are included
+    session.flush()
+    deltas = session.info.pop("stats_deltas", None)
+    if deltas:
+        apply_deltas(session, deltas)
+        # Lets read caches drop their copies once the commit succeeds
+        session.info["stats_written"] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_deltas(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("stats_deltas", None)
+
+
+# --- Reading ---
+def read_stats(db: Session, scopes: Optional[List[str]] = None) -> Dict[str, Tuple[int, float]]:
+    """{scope: (count, balance)} summed over shards; all scopes when ``scopes`` is None."""
+    stmt = select(BankStat.scope, func.sum(BankStat.count), func.sum(BankStat.balance)).group_by(BankStat.scope)
+    if scopes is not None:
+        stmt = stmt.where(BankStat.scope.in_(scopes))
+    return {scope: (int(count or 0), float(balance or 0.0)) for scope, count, balance in db.execute(stmt)}
+
+
+# --- Reconciliation ---
+def _drift_query():
+    """
+    Actual aggregates minus the stored counters, per scope, in one statement
+    (so both sides come from the same snapshot).
+    """
+    customer_status = literal("customers:status:") + func.coalesce(Customer.status, "")
+    account_type = literal("accounts:type:") + func.coalesce(Account.account_type, "")
+    account_status = literal("accounts:status:") + func.coalesce(Account.status, "")
+    account_sum = func.coalesce(func.sum(Account.balance), 0.0)
+    parts = union_all(
+        select(literal(CUSTOMERS).label("scope"), func.count().label("count"), literal(0.0).label("balance"))
+        .select_from(Customer),
+        select(customer_status, func.count(), literal(0.0)).group_by(customer_status),
+        select(literal(ACCOUNTS), func.count(), account_sum).select_from(Account),
+        select(account_type, func.count(), account_sum).group_by(account_type),
+        select(account_status, func.count(), account_sum).group_by(account_status),
+        select(BankStat.scope, -func.sum(BankStat.count), -func.sum(BankStat.balance)).group_by(BankStat.scope),
+    ).subquery()
+    return select(parts.c.scope, func.sum(parts.c["count"]), func.sum(parts.c.balance)).group_by(parts.c.scope)
+
+
+def _lock_reconciliation(db: Session):
+    """
+    Serialize reconcilers. The UPDATE takes the write lock (the counter row
+    on Postgres, the database on SQLite) before any drift is read, so of two
+    concurrent runs the second sees the first one's corrections.
+    """
+    bump = update(Counter).where(Counter.name == RECONCILE_LOCK).values(value=Counter.value + 1)
+    if db.execute(bump).rowcount:
+        return
+    try:
+        db.execute(insert(Counter).values(name=RECONCILE_LOCK, value=1))
+    except IntegrityError:
+        # Another reconciler created the row first; queue behind its lock
+        db.rollback()
+        db.execute(bump)
+
+
+def _reconcile_locked(db: Session) -> int:
+    corrections = {
+        scope: (int(count or 0), float(balance or 0.0))
+        for scope, count, balance in db.execute(_drift_query())
+        if count or abs(balance or 0.0) > BALANCE_TOLERANCE
+    }
+    if corrections:
+        apply_deltas(db, corrections, shard=0)
+        db.info["stats_written"] = True
+    db.commit()
+    return len(corrections)
+
+
+def reconcile_stats(db: Session) -> int:
+    """Correct any drift with compensating deltas; returns the number of scopes fixed."""
+    try:
+        _lock_reconciliation(db)
+        return _reconcile_locked(db)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def stats_initialized(db: Session) -> bool:
+    return db.scalar(select(BankStat.scope).limit(1)) is not None
+
+
+def bootstrap_stats(db: Session) -> bool:
+    """
+    First boot: one full count. Workers starting together queue on the
+    reconciliation lock; only the first finds the counters empty and counts.
+    Returns True if this caller did the count.
+    """
+    if stats_initialized(db):
+        return False
+    try:
+        _lock_reconciliation(db)
+        if stats_initialized(db):
+            db.commit()
+            return False
+        _reconcile_locked(db)
+        return True
+    except Exception:
+        db.rollback()
+        raise
@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import insert, inspect, select, text, tuple_, update
+from sqlalchemy.orm import Session
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.crud.outbox import enqueue_events
+
+def record_transactions(db: Session, entries: List[dict]):
+    """
+    Append ledger rows for a balance change and queue the matching
+    transaction-service events, inside the caller's DB transaction.
+
+    Each entry has account_id, type, amount and details. Multi-leg
+    operations pass all their entries at once so both tables get a single
+    bulk INSERT. Never commits.
+    """
+    if not entries:
+        return
+    now = datetime.utcnow()
+    db.execute(insert(Transaction), [{**entry, "timestamp": now} for entry in entries])
+    enqueue_events(db, [
+        {
+            "accountId": entry["account_id"],
+            "type": entry["type"],
+            "amount": entry["amount"],
+            "details": entry["details"],
+        }
+        for entry in entries
+    ])
+
+def detach_transactions(db: Session, account_ids):
+    """
+    Keep the ledger rows of accounts about to be deleted: one UPDATE copies
+    each account's number onto its rows and clears account_id. ``account_ids``
+    may be a list or a SELECT of IDs. Never commits.
+    """
+    number = select(Account.account_number).where(Account.id == Transaction.account_id).scalar_subquery()
+    db.execute(
+        update(Transaction)
+        .where(Transaction.account_id.in_(account_ids))
+        # Number first: some databases apply SET clauses left to right
+        .ordered_values((Transaction.account_number, number), (Transaction.account_id, None)),
+        execution_options={"synchronize_session": False},
+    )
+
+# --- Schema upgrade for ledgers created before detach_transactions ---
+def upgrade_ledger_schema(db: Session):
+    """
+    Startup hook: create_all never alters an existing table, so bring an older
+    transactions table up to the model (account_number column, nullable
+    account_id with ON DELETE SET NULL, history index). Idempotent; commits.
+    """
+    connection = db.connection()
+    columns = {c["name"]: c for c in inspect(connection).get_columns("transactions")}
+    if "account_number" not in columns:
+        connection.execute(text("ALTER TABLE transactions ADD COLUMN account_number VARCHAR"))
+    if not columns["account_id"]["nullable"]:
+        if connection.dialect.name == "postgresql":
+            _upgrade_postgres_account_fk(connection)
+        else:
+            _rebuild_transactions_table(connection)
+    for index in Transaction.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    db.commit()
+
+def _upgrade_postgres_account_fk(connection):
+    fks = [fk for fk in inspect(connection).get_foreign_keys("transactions") if fk["constrained_columns"] == ["account_id"]]
+    for fk in fks:
+        connection.execute(text('ALTER TABLE transactions DROP CONSTRAINT IF EXISTS "%s"' % fk["name"]))
+    connection.execute(text("ALTER TABLE transactions ALTER COLUMN account_id DROP NOT NULL"))
+    connection.execute(text(
+        "ALTER TABLE transactions ADD CONSTRAINT transactions_account_id_fkey "
+        "FOREIGN KEY (account_id) REFERENCES accounts (id) ON DELETE SET NULL"
+    ))
+
+def _rebuild_transactions_table(connection):
+    # SQLite cannot drop NOT NULL in place: copy into a table built from the model.
+    # Index names are global there, so the old ones go before the rename
+    for index in inspect(connection).get_indexes("transactions"):
+        connection.execute(text('DROP INDEX IF EXISTS "%s"' % index["name"]))
+    connection.execute(text("ALTER TABLE transactions RENAME TO transactions_old"))
+    Transaction.__table__.create(connection)
+    names = ", ".join(column.name for column in Transaction.__table__.columns)
+    connection.execute(text(f"INSERT INTO transactions ({names}) SELECT {names} FROM transactions_old"))
+    connection.execute(text("DROP TABLE transactions_old"))
+
+# --- History reads (served by ix_transactions_account_id_timestamp) ---
+def get_transactions_page(
+    db: Session,
+    account_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[Transaction]:
+    """Newest-first page; ``after`` is the (timestamp, id) of the previous page's last row."""
+    stmt = select(Transaction).where(Transaction.account_id == account_id)
+    if after:
+        stmt = stmt.where(tuple_(Transaction.timestamp, Transaction.id) < tuple_(*after))
+    stmt = stmt.order_by(Transaction.timestamp.desc(), Transaction.id.desc()).limit(limit)
+    return list(db.scalars(stmt))
+
+def iter_transactions(db: Session, account_id: int, batch_size: int = 1000) -> Iterator[tuple]:
+    """
+    Oldest-first plain rows from a server-side cursor, ``batch_size`` at a time.
+    Selects columns rather than entities so nothing piles up in the identity map.
+    """
+    stmt = (
+        select(Transaction.id, Transaction.timestamp, Transaction.type, Transaction.amount, Transaction.details)
+        .where(Transaction.account_id == account_id)
+        .order_by(Transaction.timestamp, Transaction.id)
+        .execution_options(yield_per=batch_size)
+    )
+    yield from db.execute(stmt)
@@ -1,20 +1,62 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
 
-from app.core.database import Base, engine, SessionLocal
-from app.routes import admin, auth, customer, account
+from app.core.config import settings
+from app.core.database import Base, engine, SessionLocal, async_engine
+from app.routes import admin, auth, customer, account, account_async, scheduled_transfer
 from app.models.admin import Admin
-from app.utils.security import hash_password
+from app.crud.search import setup_search
+from app.crud.stats import bootstrap_stats
+from app.crud.transaction import upgrade_ledger_schema
+from app.services.outbox_dispatcher import outbox_worker
+from app.services.stats_reconciler import stats_worker
+from app.services.batch_jobs import batch_worker
+from app.services.scheduled_transfers import scheduled_transfer_workers
+from app.utils.revocation import revocation_index, revocation_worker
+from app.utils.idempotency import IdempotentReplay, idempotency_purge_worker
+from app.utils.security import hash_password, PasswordHashingBusy, shutdown_password_pool
 
 # --- LIFESPAN MANAGER (Runs on Startup) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 1. Create Tables
     Base.metadata.create_all(bind=engine)
+
+    # ...and bring a ledger created by an older release up to the model:
+    # account deletion relies on it, so a failure here stops startup
+    db = SessionLocal()
+    try:
+        upgrade_ledger_schema(db)
+    finally:
+        db.close()
     
-    # 2. Seed the First Admin
+    # 2. Search indexes (pg_trgm on Postgres, n-gram backfill elsewhere).
+    # Optional: without them search falls back to slower plans, so a failure
+    # (e.g. no privilege for CREATE EXTENSION) must not block startup
+    db = SessionLocal()
+    try:
+        setup_search(db)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Search index setup failed, search will be slower: {e}")
+    finally:
+        db.close()
+
+    # 3. Dashboard counters: one full count on first boot (by one worker only),
+    # increments after that
+    db = SessionLocal()
+    try:
+        bootstrap_stats(db)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Dashboard counter bootstrap failed, the reconciler will retry: {e}")
+    finally:
+        db.close()
+
+    # 4. Seed the First Admin
     db = SessionLocal()
     try:
         # Check if any admin exists
@@ -34,12 +76,65 @@ async def lifespan(app: FastAPI):
         print(f"❌ Error seeding admin: {e}")
     finally:
         db.close()
+
+    # 5. Start delivering queued transaction-service notifications
+    if settings.OUTBOX_DISPATCHER_ENABLED:
+        outbox_worker.start()
+
+    # 6. Load revoked refresh tokens, then keep pulling other workers' revocations
+    revocation_index.sync()
+    revocation_worker.start()
+
+    # 7. Periodically correct any drift in the dashboard counters
+    if settings.STATS_RECONCILE_ENABLED:
+        stats_worker.start()
+
+    # 8. Interest / fee runs for the previous month (idempotent per period)
+    if settings.BATCH_SCHEDULER_ENABLED:
+        batch_worker.start()
+
+    # 9. Drop expired Idempotency-Keys
+    idempotency_purge_worker.start()
+
+    # 10. Execute due standing orders (several executors may share the table)
+    if settings.SCHEDULED_TRANSFER_ENABLED:
+        for worker in scheduled_transfer_workers:
+            worker.start()
     
     yield # The application runs here
 
+    outbox_worker.stop()
+    revocation_worker.stop()
+    stats_worker.stop()
+    batch_worker.stop()
+    idempotency_purge_worker.stop()
+    for worker in scheduled_transfer_workers:
+        worker.stop()
+    shutdown_password_pool()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 # --- APP INITIALIZATION ---
 app = FastAPI(title="Banking Management System", lifespan=lifespan)
 
+# --- Password pool back-pressure: shed login/register load instead of queueing ---
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+# --- Idempotency-Key replays: the stored response, as first sent ---
+@app.exception_handler(IdempotentReplay)
+async def idempotent_replay_handler(request: Request, exc: IdempotentReplay):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=exc.content,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
 # --- CORS SETTINGS (Allow Frontend) ---
 origins = [
     "http://localhost:3000",
@@ -60,4 +155,9 @@ app.add_middleware(
 app.include_router(admin.router)
 app.include_router(auth.router)
 app.include_router(customer.router)
+# Before both account routers: their "/{account_id}" would match its paths
+app.include_router(scheduled_transfer.router)
+# Async mode: the async handlers are registered first and take over their paths
+if settings.DATABASE_ASYNC_MODE:
+    app.include_router(account_async.router)
 app.include_router(account.router)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
-from sqlalchemy import Integer, String, Float, ForeignKey, DateTime, CheckConstraint
+from sqlalchemy import Integer, String, Float, ForeignKey, DateTime, CheckConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.core.database import Base
@@ -14,6 +14,9 @@ class Account(Base):
     # Prevent negative balances at the database level
     __table_args__ = (
         CheckConstraint('balance >= 0', name='check_positive_balance'),
+        # "This customer's accounts" (eager loads) and the admin listing's
+        # account type / balance filters are all probes on this index
+        Index("ix_accounts_customer_id_type_balance", "customer_id", "account_type", "balance"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import Integer, String, Float
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+
+class BankStat(Base):
+    """
+    Incrementally maintained dashboard counters (see app/crud/stats.py).
+
+    ``scope`` is "customers", "accounts" or a breakdown such as
+    "accounts:type:savings". Each scope is spread over several ``shard`` rows
+    so concurrent transactions rarely wait on the same row; readers sum them.
+    """
+    __tablename__ = "bank_stats"
+
+    scope: Mapped[str] = mapped_column(String, primary_key=True)
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    balance: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
@@ -0,0 +1,24 @@
+from typing import Optional
+from sqlalchemy import Integer, String, Float, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.database import Base
+
+class BatchRun(Base):
+    """
+    One balance-processing job (e.g. "interest") for one period ("2026-10").
+
+    The (job, period) key makes each run happen once; ``last_account_id`` is
+    the checkpoint, advanced in the same transaction as each chunk.
+    """
+    __tablename__ = "batch_runs"
+
+    job: Mapped[str] = mapped_column(String, primary_key=True)
+    period: Mapped[str] = mapped_column(String, primary_key=True)
+    status: Mapped[str] = mapped_column(String, default="running")  # "running" or "completed"
+    last_account_id: Mapped[int] = mapped_column(Integer, default=0)
+    accounts_processed: Mapped[int] = mapped_column(Integer, default=0)
+    total_amount: Mapped[float] = mapped_column(Float, default=0.0)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
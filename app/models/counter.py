@@ -0,0 +1,10 @@
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+
+class Counter(Base):
+    """Named monotonic counters handed out in blocks (e.g. account numbers)."""
+    __tablename__ = "counters"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
-from sqlalchemy import String, Integer, DateTime
+from sqlalchemy import String, Integer, DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.core.database import Base
@@ -11,6 +11,12 @@ if TYPE_CHECKING:
 class Customer(Base):
     __tablename__ = "customers"
 
+    # Admin listing is keyset-paginated on (created_at, id), optionally per status
+    __table_args__ = (
+        Index("ix_customers_created_at_id", "created_at", "id"),
+        Index("ix_customers_status_created_at_id", "status", "created_at", "id"),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     first_name: Mapped[str] = mapped_column(String, nullable=False)
     last_name: Mapped[str] = mapped_column(String, nullable=False)
@@ -23,3 +29,12 @@ class Customer(Base):
 
     # Type hint works for static analysis, relationship works at runtime
     accounts: Mapped[list[Account]] = relationship("Account", back_populates="customer")
+
+
+# Case-insensitive email prefix search (app/crud/search.py). text_pattern_ops
+# lets Postgres plan LIKE 'prefix%' as an index range under any collation.
+Index(
+    "ix_customers_email_lower",
+    func.lower(Customer.email).label("email_lower"),
+    postgresql_ops={"email_lower": "text_pattern_ops"},
+)
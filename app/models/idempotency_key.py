@@ -0,0 +1,22 @@
+from typing import Any, Optional
+from sqlalchemy import Integer, String, DateTime, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.database import Base
+
+class IdempotencyKey(Base):
+    """
+    A client-supplied Idempotency-Key and the response it produced.
+
+    The row is inserted in the same DB transaction as the balance change, so
+    it exists if and only if the change does. Keys are per principal.
+    """
+    __tablename__ = "idempotency_keys"
+
+    scope: Mapped[str] = mapped_column(String, primary_key=True)  # "customer:<id>" or "admin:<id>"
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String, nullable=False)  # Hash of method, path and query
+    status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    response: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
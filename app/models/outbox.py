@@ -0,0 +1,27 @@
+from typing import Optional
+from sqlalchemy import Integer, String, DateTime, JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.database import Base
+
+class OutboxEvent(Base):
+    """
+    A transaction-service notification waiting to be delivered.
+
+    Rows are written in the same DB transaction as the balance change they
+    describe and deleted by the dispatcher once delivered.
+    """
+    __tablename__ = "outbox_events"
+
+    # The dispatcher only ever scans pending rows that are due
+    __table_args__ = (
+        Index("ix_outbox_events_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(String, default="pending")  # "pending" or "dead"
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
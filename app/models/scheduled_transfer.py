@@ -0,0 +1,37 @@
+from typing import Optional
+from sqlalchemy import Integer, String, Float, ForeignKey, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.database import Base
+
+class ScheduledTransfer(Base):
+    """
+    A standing order: ``amount`` from ``from_account_id`` to
+    ``to_account_number`` at ``next_run_at``, repeating per ``frequency``.
+
+    Occurrences are anchored to ``start_at`` (run N is start_at + N periods),
+    so monthly orders keep their day of month instead of drifting.
+    """
+    __tablename__ = "scheduled_transfers"
+
+    __table_args__ = (
+        # The executor only scans active rows that are due
+        Index("ix_scheduled_transfers_status_next_run_at", "status", "next_run_at"),
+        Index("ix_scheduled_transfers_customer_id", "customer_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    customer_id: Mapped[int] = mapped_column(Integer, ForeignKey("customers.id"), nullable=False)
+    from_account_id: Mapped[int] = mapped_column(Integer, ForeignKey("accounts.id"), nullable=False)
+    to_account_number: Mapped[str] = mapped_column(String, nullable=False)
+    amount: Mapped[float] = mapped_column(Float, nullable=False)
+    frequency: Mapped[str] = mapped_column(String, nullable=False)  # "once", "daily", "weekly", "monthly"
+    start_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    next_run_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    runs: Mapped[int] = mapped_column(Integer, default=0)  # Occurrences processed so far
+    status: Mapped[str] = mapped_column(String, default="active")  # "active", "paused", "completed", "failed", "cancelled"
+    last_run_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_result: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # "applied" or "rejected"
+    last_error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,17 @@
+from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+
+class CustomerSearchGram(Base):
+    """
+    Trigram index for customer search on databases without pg_trgm (SQLite).
+
+    One row per distinct trigram of a customer's "first last email" text and
+    account numbers. Maintained by app/crud/search.py; unused on Postgres.
+    """
+    __tablename__ = "customer_search_grams"
+
+    # (gram, customer_id) doubles as the lookup index for gram IN (...) and
+    # gram-prefix range scans
+    gram: Mapped[str] = mapped_column(String, primary_key=True)
+    customer_id: Mapped[int] = mapped_column(Integer, ForeignKey("customers.id"), primary_key=True, index=True)
@@ -1,13 +1,21 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Index
 from datetime import datetime
 from app.core.database import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
 
+    # History reads are "this account, newest first": one index range scan
+    __table_args__ = (
+        Index("ix_transactions_account_id_timestamp", "account_id", "timestamp"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
-    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
-    type = Column(String, nullable=False)  # "withdraw", "transfer", "credit", "debit"
+    # The ledger outlives its accounts: deleting one clears account_id and
+    # keeps the number on the row (see detach_transactions)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True)
+    account_number = Column(String, nullable=True)  # Only set once account_id is cleared
+    type = Column(String, nullable=False)  # "withdraw", "transfer", "deposit"
     amount = Column(Float, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
     details = Column(String, nullable=True)  # e.g., "Transferred to account 2"
@@ -1,25 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-import random
-import requests 
+from typing import List, Optional
+import csv
+import io
 from pydantic import BaseModel # <--- Added for the lookup response model
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.core.config import settings
 from app.models.account import Account
-from app.models.customer import Customer
-from app.schemas.account import AccountCreate, AccountResponse
+from app.schemas.account import AccountCreate, AccountResponse, TransferBatchRequest, TransferBatchResponse
 from app.crud.account import (
-    create_account, 
+    open_account, 
     get_accounts_by_customer, 
     get_account_by_id,
-    get_account_by_number, 
-    get_account_for_update,
-    update_balance, 
+    get_account_owner_initials,
+    debit_balance,
+    lock_transfer_accounts,
+    apply_balance_deltas,
+    plan_transfer_legs,
     delete_account
 )
-from app.utils.auth_customer import get_current_customer
+from app.crud.transaction import record_transactions, get_transactions_page, iter_transactions
+from app.schemas.transaction import TransactionPage
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.auth_customer import get_current_customer_principal
+from app.utils.principal import Principal
+from app.utils.read_cache import lookup_cache
+from app.utils.idempotency import IdempotentRequest, idempotent_request, reserve_key, complete_key
 
 router = APIRouter(prefix="/accounts", tags=["Accounts"])
 
@@ -28,57 +36,49 @@ class AccountLookupResponse(BaseModel):
     account_number: str
     owner_name: str
 
-def generate_account_number():
-    return "".join([str(random.randint(0, 9)) for _ in range(9)])
+def mask_owner_name(first_name: str, last_name: str) -> str:
+    # Censor the name (e.g., "John Doe" -> "J*** D***")
+    def censor(name):
+        if not name: return "***"
+        return name[0] + "***" if len(name) > 0 else "***"
+
+    return f"{censor(first_name)} {censor(last_name)}"
 
 # --- NEW: Lookup Endpoint ---
 @router.get("/lookup/{account_number}", response_model=AccountLookupResponse)
 def lookup_account_owner(
     account_number: str,
     db: Session = Depends(get_db),
-    current_customer: Customer = Depends(get_current_customer)
+    current_customer: Principal = Depends(get_current_customer_principal)
 ):
-    # 1. Find the account
-    account = get_account_by_number(db, account_number)
-    if not account:
+    # Hits come from the lookup LRU; misses are one joined query, shared by
+    # concurrent identical lookups
+    result = lookup_cache.get_or_compute(
+        account_number,
+        lambda: masked_lookup(get_account_owner_initials(db, account_number)),
+    )
+    if result is None:
         raise HTTPException(status_code=404, detail="Account not found")
-    
-    # 2. Find the owner
-    owner = db.query(Customer).filter(Customer.id == account.customer_id).first()
-    if not owner:
-        raise HTTPException(status_code=404, detail="Account owner not found")
+    return result
 
-    # 3. Censor the name (e.g., "John Doe" -> "J*** D***")
-    def censor(name):
-        if not name: return "***"
-        return name[0] + "***" if len(name) > 0 else "***"
-        
-    censored_name = f"{censor(owner.first_name)} {censor(owner.last_name)}"
-    
-    return {"account_number": account.account_number, "owner_name": censored_name}
+def masked_lookup(row) -> Optional[dict]:
+    if row is None:
+        return None
+    return {"account_number": row.account_number, "owner_name": mask_owner_name(row.first_initial, row.last_initial)}
 
 @router.post("/", response_model=AccountResponse)
 def create_customer_account(
     payload: AccountCreate,
     db: Session = Depends(get_db),
-    current_customer: Customer = Depends(get_current_customer)
+    current_customer: Principal = Depends(get_current_customer_principal)
 ):
-    new_account_number = generate_account_number()
-    while db.query(Account).filter(Account.account_number == new_account_number).first():
-        new_account_number = generate_account_number()
-
-    account = Account(
-        customer_id=current_customer.id,
-        account_type=payload.account_type,
-        account_number=new_account_number,
-        balance=0.0
-    )
-    return create_account(db, account)
+    # Numbers come from the block allocator: unique by construction, no probing
+    return open_account(db, current_customer.id, payload.account_type)
 
 @router.get("/", response_model=List[AccountResponse])
 def list_customer_accounts(
     db: Session = Depends(get_db),
-    current_customer: Customer = Depends(get_current_customer)
+    current_customer: Principal = Depends(get_current_customer_principal)
 ):
     return get_accounts_by_customer(db, current_customer.id)
 
@@ -86,49 +86,110 @@ def list_customer_accounts(
 def get_account_details(
     account_id: int,
     db: Session = Depends(get_db),
-    current_customer: Customer = Depends(get_current_customer)
+    current_customer: Principal = Depends(get_current_customer_principal)
 ):
     account = get_account_by_id(db, account_id)
     if not account or account.customer_id != current_customer.id:
         raise HTTPException(status_code=404, detail="Account not found")
     return account
 
-@router.post("/{account_id}/withdraw", response_model=AccountResponse)
-def withdraw_account(
+# --- NEW: Transaction History (keyset pagination on (timestamp, id)) ---
+@router.get("/{account_id}/transactions", response_model=TransactionPage)
+def list_account_transactions(
     account_id: int,
-    amount: float,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_customer: Customer = Depends(get_current_customer)
+    current_customer: Principal = Depends(get_current_customer_principal)
 ):
+    account = get_account_by_id(db, account_id)
+    if not account or account.customer_id != current_customer.id:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Fetch one extra row to know whether another page exists
+    rows = get_transactions_page(db, account_id, limit + 1, after)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+    return {"items": rows, "next_cursor": next_cursor}
+
+# --- NEW: Streaming CSV Statement ---
+@router.get("/{account_id}/statement.csv")
+def export_account_statement(
+    account_id: int,
+    db: Session = Depends(get_db),
+    current_customer: Principal = Depends(get_current_customer_principal)
+):
+    account = get_account_by_id(db, account_id)
+    if not account or account.customer_id != current_customer.id:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    def generate():
+        # The stream outlives the request's session, so it reads through its own
+        stream_db = SessionLocal()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        try:
+            writer.writerow(["id", "timestamp", "type", "amount", "details"])
+            for row in iter_transactions(stream_db, account_id):
+                writer.writerow([row.id, row.timestamp.isoformat(), row.type, row.amount, row.details or ""])
+                if buffer.tell() >= 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="statement-{account.account_number}.csv"'}
+    )
+
+# --- Money movement ---
+# Shared by the sync routes below and the async routes (via AsyncSession.run_sync)
+def perform_withdraw(
+    db: Session,
+    customer_id: int,
+    account_id: int,
+    amount: float,
+    idem: Optional[IdempotentRequest] = None,
+) -> Account:
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid amount")
 
     try:
-        # 1. Lock Row
-        account = get_account_for_update(db, account_id)
-        
-        if not account or account.customer_id != current_customer.id:
-            raise HTTPException(status_code=404, detail="Account not found")
-            
-        if account.balance < amount:
+        # 0. Claim the Idempotency-Key (a replay is raised here, before any account row)
+        reserve_key(db, idem)
+
+        # 1. Conditional debit: balance check and update in one statement
+        account = debit_balance(db, account_id, amount, customer_id=customer_id)
+
+        if not account:
+            # Only the failure path pays for a second look, to pick the right error
+            existing = get_account_by_id(db, account_id)
+            if not existing or existing.customer_id != customer_id:
+                raise HTTPException(status_code=404, detail="Account not found")
             raise HTTPException(status_code=400, detail="Insufficient balance")
 
-        # 2. Update Balance
-        update_balance(db, account, -amount)
-        
-        # 3. Call Node.js Microservice
-        try:
-            requests.post(settings.TRANSACTION_SERVICE_URL, json={
-                "accountId": account.id,
-                "type": "withdraw",
-                "amount": amount,
-                "details": "ATM Withdrawal"
-            }, timeout=2)
-        except Exception as e:
-            print(f"Warning: Failed to save transaction history: {e}")
+        # 2. Write the ledger row and queue the Node.js Microservice notification
+        record_transactions(db, [{
+            "account_id": account.id,
+            "type": "withdraw",
+            "amount": amount,
+            "details": "ATM Withdrawal"
+        }])
+        complete_key(db, idem, AccountResponse.model_validate(account).model_dump(mode="json"))
         
         db.commit()
-        db.refresh(account)
         return account
         
     except HTTPException:
@@ -138,75 +199,66 @@ def withdraw_account(
         db.rollback()
         raise HTTPException(status_code=500, detail="Withdrawal failed")
 
-@router.post("/transfer", response_model=List[AccountResponse])
-def transfer_account(
+def perform_transfer(
+    db: Session,
+    customer_id: int,
     from_account_id: int,
     to_account_number: str,
     amount: float,
-    db: Session = Depends(get_db),
-    current_customer: Customer = Depends(get_current_customer)
-):
+    idem: Optional[IdempotentRequest] = None,
+) -> List[Account]:
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid amount")
 
     try:
-        # 1. Resolve Target Account Number -> ID
-        target_account_lookup = get_account_by_number(db, to_account_number)
-        if not target_account_lookup:
+        # 0. Claim the Idempotency-Key (a replay is raised here, before any account row)
+        reserve_key(db, idem)
+
+        # 1. Resolve target by number and lock both rows (ID order) in one statement
+        locked = lock_transfer_accounts(db, from_account_id, [to_account_number])
+        from_account = next((a for a in locked if a.id == from_account_id), None)
+        to_account = next((a for a in locked if a.account_number == to_account_number), None)
+
+        # --- VALIDATION CHECKS ---
+        if not to_account:
             raise HTTPException(status_code=404, detail="Target account number not found")
-        
-        to_account_id = target_account_lookup.id
 
-        if str(from_account_id) == str(to_account_id):
+        if to_account.id == from_account_id:
              raise HTTPException(status_code=400, detail="Cannot transfer to the same account")
 
-        # 2. Lock Rows (Sorted ID order to prevent Deadlock)
-        first_id, second_id = sorted([from_account_id, to_account_id])
-        get_account_for_update(db, first_id)
-        get_account_for_update(db, second_id)
-        
-        # 3. Fetch fresh objects
-        from_account = get_account_by_id(db, from_account_id)
-        to_account = get_account_by_id(db, to_account_id)
-
-        # --- FIX: VALIDATION CHECKS ---
-        if not from_account or from_account.customer_id != current_customer.id:
+        if not from_account or from_account.customer_id != customer_id:
             raise HTTPException(status_code=404, detail="Source account not found")
-            
-        if not to_account:  # <--- THIS WAS MISSING
-            raise HTTPException(status_code=404, detail="Target account not found")
 
         if from_account.balance < amount:
             raise HTTPException(status_code=400, detail="Insufficient balance")
         # ------------------------------
 
-        # 4. Update Balances
-        update_balance(db, from_account, -amount)
-        update_balance(db, to_account, amount)
+        # 2. Update both balances in one UPDATE ... RETURNING
+        updated = {a.id: a for a in apply_balance_deltas(db, {from_account.id: -amount, to_account.id: amount})}
+        from_account, to_account = updated[from_account.id], updated[to_account.id]
 
-        # 5. Call Node.js Microservice
-        try:
+        # 3. Write both ledger rows and queue the Node.js Microservice notifications
+        record_transactions(db, [
             # Sender Receipt
-            requests.post(settings.TRANSACTION_SERVICE_URL, json={
-                "accountId": from_account.id,
+            {
+                "account_id": from_account.id,
                 "type": "transfer",
                 "amount": amount,
                 "details": f"To Acc: {to_account.account_number}"
-            }, timeout=2)
-            
+            },
             # Receiver Receipt
-            requests.post(settings.TRANSACTION_SERVICE_URL, json={
-                "accountId": to_account.id,
+            {
+                "account_id": to_account.id,
                 "type": "deposit",
                 "amount": amount,
                 "details": f"From Acc: {from_account.account_number}"
-            }, timeout=2)
-        except Exception as e:
-            print(f"Warning: Failed to save transaction history: {e}")
+            },
+        ])
+        complete_key(db, idem, [
+            AccountResponse.model_validate(a).model_dump(mode="json") for a in (from_account, to_account)
+        ])
         
         db.commit()
-        db.refresh(from_account)
-        db.refresh(to_account)
         return [from_account, to_account]
 
     except HTTPException:
@@ -216,11 +268,111 @@ def transfer_account(
         db.rollback()
         raise HTTPException(status_code=500, detail="Transfer failed")
 
+@router.post("/{account_id}/withdraw", response_model=AccountResponse)
+def withdraw_account(
+    account_id: int,
+    amount: float,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_customer: Principal = Depends(get_current_customer_principal)
+):
+    idem = idempotent_request(request, current_customer, idempotency_key)
+    return perform_withdraw(db, current_customer.id, account_id, amount, idem)
+
+@router.post("/transfer", response_model=List[AccountResponse])
+def transfer_account(
+    from_account_id: int,
+    to_account_number: str,
+    amount: float,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_customer: Principal = Depends(get_current_customer_principal)
+):
+    idem = idempotent_request(request, current_customer, idempotency_key)
+    return perform_transfer(db, current_customer.id, from_account_id, to_account_number, amount, idem)
+
+# --- NEW: Batch Transfers (payroll / vendor disbursements) ---
+@router.post("/transfer/batch", response_model=TransferBatchResponse)
+def transfer_batch(
+    payload: TransferBatchRequest,
+    db: Session = Depends(get_db),
+    current_customer: Principal = Depends(get_current_customer_principal)
+):
+    if not payload.legs:
+        raise HTTPException(status_code=400, detail="No transfer legs provided")
+    if len(payload.legs) > settings.TRANSFER_BATCH_MAX_LEGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {settings.TRANSFER_BATCH_MAX_LEGS} legs"
+        )
+
+    try:
+        # 1. Resolve every target and lock all involved rows once (ID order)
+        to_account_numbers = list({leg.to_account_number for leg in payload.legs})
+        locked = lock_transfer_accounts(db, payload.from_account_id, to_account_numbers)
+        source = next((a for a in locked if a.id == payload.from_account_id), None)
+
+        if not source or source.customer_id != current_customer.id:
+            raise HTTPException(status_code=404, detail="Source account not found")
+
+        targets = {a.account_number: a for a in locked}
+
+        # 2. Validate each leg; the batch total must be covered by the balance
+        legs = [(leg.to_account_number, leg.amount) for leg in payload.legs]
+        deltas, results = plan_transfer_legs(source, targets, legs)
+        if any(r["detail"] == "Insufficient balance" for r in results):
+            requested = sum(r["amount"] for r in results if r["status"] == "applied" or r["detail"] == "Insufficient balance")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient balance for batch total {requested:.2f}"
+            )
+
+        # 3. Apply all legs with set-based updates
+        updated = {a.id: a for a in apply_balance_deltas(db, deltas)}
+        source = updated.get(source.id, source)
+
+        # 4. Bulk-write ledger rows and receipts for every applied leg
+        applied = [r for r in results if r["status"] == "applied"]
+        entries = []
+        for r in applied:
+            target = targets[r["to_account_number"]]
+            entries.append({
+                "account_id": source.id,
+                "type": "transfer",
+                "amount": r["amount"],
+                "details": f"To Acc: {target.account_number}"
+            })
+            entries.append({
+                "account_id": target.id,
+                "type": "deposit",
+                "amount": r["amount"],
+                "details": f"From Acc: {source.account_number}"
+            })
+        record_transactions(db, entries)
+
+        db.commit()
+        return {
+            "from_account": source,
+            "total_amount": sum(r["amount"] for r in applied),
+            "applied_count": len(applied),
+            "rejected_count": len(results) - len(applied),
+            "results": results,
+        }
+
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Batch transfer failed")
+
 @router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
 def close_account(
     account_id: int,
     db: Session = Depends(get_db),
-    current_customer: Customer = Depends(get_current_customer)
+    current_customer: Principal = Depends(get_current_customer_principal)
 ):
     account = get_account_by_id(db, account_id)
     if not account or account.customer_id != current_customer.id:
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.core.database import get_async_db
+from app.schemas.account import AccountResponse
+from app.crud import async_account
+from app.routes.account import AccountLookupResponse, masked_lookup, perform_withdraw, perform_transfer
+from app.utils.auth_customer import get_current_customer_principal_async
+from app.utils.principal import Principal
+from app.utils.read_cache import lookup_cache
+from app.utils.idempotency import idempotent_request
+
+# Async (AsyncEngine) versions of the hot /accounts endpoints.
+# Included ahead of app.routes.account when settings.DATABASE_ASYNC_MODE is on,
+# so these handle the matching paths and everything else falls through.
+router = APIRouter(prefix="/accounts", tags=["Accounts"])
+
+@router.get("/lookup/{account_number}", response_model=AccountLookupResponse)
+async def lookup_account_owner_async(
+    account_number: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_customer: Principal = Depends(get_current_customer_principal_async)
+):
+    async def lookup():
+        return masked_lookup(await async_account.get_account_owner_initials(db, account_number))
+
+    result = await lookup_cache.get_or_compute_async(account_number, lookup)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return result
+
+@router.get("/", response_model=List[AccountResponse])
+async def list_customer_accounts_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_customer: Principal = Depends(get_current_customer_principal_async)
+):
+    return await async_account.get_accounts_by_customer(db, current_customer.id)
+
+@router.get("/{account_id}", response_model=AccountResponse)
+async def get_account_details_async(
+    account_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_customer: Principal = Depends(get_current_customer_principal_async)
+):
+    account = await async_account.get_account_by_id(db, account_id)
+    if not account or account.customer_id != current_customer.id:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return account
+
+@router.post("/{account_id}/withdraw", response_model=AccountResponse)
+async def withdraw_account_async(
+    account_id: int,
+    amount: float,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_customer: Principal = Depends(get_current_customer_principal_async)
+):
+    # Cached replays are answered here without a DB round trip
+    idem = idempotent_request(request, current_customer, idempotency_key)
+    return await db.run_sync(perform_withdraw, current_customer.id, account_id, amount, idem)
+
+@router.post("/transfer", response_model=List[AccountResponse])
+async def transfer_account_async(
+    from_account_id: int,
+    to_account_number: str,
+    amount: float,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_customer: Principal = Depends(get_current_customer_principal_async)
+):
+    idem = idempotent_request(request, current_customer, idempotency_key)
+    return await db.run_sync(perform_transfer, current_customer.id, from_account_id, to_account_number, amount, idem)
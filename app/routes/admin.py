@@ -1,22 +1,27 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func # <--- Used for summing balances
-import requests 
 
-from app.core.database import get_db
 from app.core.config import settings
+from app.core.database import get_db, engine, pool_metrics, async_engine, async_pool_metrics
 from app.schemas.admin import AdminCreate, AdminOut
 from app.crud import admin as crud_admin
-from app.utils.auth_admin import get_current_admin
+from app.utils.auth_admin import get_current_admin_principal
+from app.utils.principal import Principal, principal_cache
+from app.utils.jwt import token_cache
 from app.models.admin import Admin
-from app.models.account import Account
-from app.models.customer import Customer
-from app.crud.account import get_account_by_id, update_balance 
+from app.crud.account import get_account_by_id, credit_balance, debit_balance
 from app.schemas.account import AccountResponse
-from app.schemas.customer import CustomerResponse
-from app.crud.customer import get_customer_by_id, delete_customer, search_customers # <--- Import search
-from app.crud.account import delete_account
+from app.schemas.customer import CustomerPage, CustomerPurgeRequest, CustomerPurgeResponse, CustomerPurgeSkip, ImportReport
+from app.services.importer import import_customers
+from app.services.batch_jobs import PERIOD_PATTERN, run_batch_job
+from app.crud.batch import JOBS
+from app.crud.customer import get_customers_page, purge_customers, search_customers # <--- Import search
+from app.crud.transaction import record_transactions
+from app.crud.stats import read_stats, CUSTOMERS, ACCOUNTS
+from app.utils.read_cache import stats_cache, lookup_cache
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.idempotency import idempotent_request, reserve_key, complete_key
 
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -26,59 +31,123 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 # --- NEW: Dashboard Stats Endpoint ---
 @router.get("/stats")
 def get_dashboard_stats(
+    breakdown: bool = False,
     db: Session = Depends(get_db), 
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
-    total_customers = db.query(Customer).count()
-    total_accounts = db.query(Account).count()
-    total_holdings = db.query(func.sum(Account.balance)).scalar() or 0.0
-    
+    # Concurrent pollers share one read; results live for a few seconds and
+    # are dropped whenever the counters change
+    return stats_cache.get_or_compute(
+        "breakdown" if breakdown else "summary",
+        lambda: _read_dashboard_stats(db, breakdown),
+    )
+
+def _read_dashboard_stats(db: Session, breakdown: bool) -> dict:
+    # Read from the incrementally maintained counters (no table scans)
+    stats = read_stats(db, None if breakdown else [CUSTOMERS, ACCOUNTS])
+    result = {
+        "total_customers": stats.get(CUSTOMERS, (0, 0.0))[0],
+        "total_accounts": stats.get(ACCOUNTS, (0, 0.0))[0],
+        "total_holdings": stats.get(ACCOUNTS, (0, 0.0))[1],
+    }
+
+    if breakdown:
+        def group(prefix: str, with_balance: bool = True):
+            return {
+                scope[len(prefix):]: {"count": count, "balance": balance} if with_balance else count
+                for scope, (count, balance) in stats.items()
+                if scope.startswith(prefix) and count
+            }
+        result["customers_by_status"] = group("customers:status:", with_balance=False)
+        result["accounts_by_type"] = group("accounts:type:")
+        result["accounts_by_status"] = group("accounts:status:")
+
+    return result
+
+# --- NEW: Connection Pool Metrics (for pool sizing) ---
+@router.get("/metrics/pool")
+def get_pool_metrics(current_admin: Principal = Depends(get_current_admin_principal)):
+    return {
+        "sync": pool_metrics.snapshot(engine.pool),
+        "async": async_pool_metrics.snapshot(async_engine.pool) if async_engine is not None else None,
+    }
+
+# --- NEW: Auth Cache Metrics (hit/miss counters) ---
+@router.get("/metrics/auth")
+def get_auth_cache_metrics(current_admin: Principal = Depends(get_current_admin_principal)):
+    return {
+        "token_cache": token_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+    }
+
+@router.get("/metrics/cache")
+def get_read_cache_metrics(current_admin: Principal = Depends(get_current_admin_principal)):
     return {
-        "total_customers": total_customers,
-        "total_accounts": total_accounts,
-        "total_holdings": total_holdings
+        "stats": stats_cache.stats(),
+        "lookup": lookup_cache.stats(),
     }
 
-# --- UPDATED: Search-Only Customer List ---
-@router.get("/customers", response_model=List[CustomerResponse])
+# --- UPDATED: Single Customer Listing (browse with keyset cursor, or search) ---
+@router.get("/customers", response_model=CustomerPage)
 def get_customers(
     q: Optional[str] = None, # Search Query
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    offset: int = Query(0, ge=0), # Search results only (they are ranked, not keyset-ordered)
+    status: Optional[str] = None,
+    account_type: Optional[str] = None,
+    min_balance: Optional[float] = Query(None, ge=0),
+    max_balance: Optional[float] = Query(None, ge=0),
     db: Session = Depends(get_db), 
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
     if q:
-        # If there is a search term, run the server-side search
-        return search_customers(db, q)
-    
-    # If NO search term, return EMPTY list (Prevents fetching everyone)
-    return []
+        # Search results are ranked, so the browse filters and keyset cursor
+        # cannot apply to them: refuse the mix rather than ignore it
+        if cursor or any(value is not None for value in (status, account_type, min_balance, max_balance)):
+            raise HTTPException(status_code=400, detail="Filters and cursor cannot be combined with q")
+        # If there is a search term, run the indexed server-side search (ranked),
+        # one extra row telling whether another page exists
+        rows = search_customers(db, q, limit=limit + 1, offset=offset)
+        next_offset = offset + limit if len(rows) > limit else None
+        return CustomerPage(items=rows[:limit], next_offset=next_offset)
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Fetch one extra row to know whether another page exists
+    rows = get_customers_page(
+        db, limit + 1, after,
+        status=status,
+        account_type=account_type,
+        min_balance=min_balance,
+        max_balance=max_balance,
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return CustomerPage(items=rows, next_cursor=next_cursor)
 
 
 @router.post("/", response_model=AdminOut)
 def create_admin(
     admin: AdminCreate, 
     db: Session = Depends(get_db), 
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
     if crud_admin.get_admin_by_username(db, admin.username):
         raise HTTPException(status_code=400, detail="Username already exists")
     return crud_admin.create_admin(db, admin)
 
-@router.get("/customers", response_model=List[CustomerResponse])
-def get_all_customers(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db), 
-    current_admin: Admin = Depends(get_current_admin)
-):
-    customers = db.query(Customer).offset(skip).limit(limit).all()
-    return customers
-
 @router.get("/{admin_id}", response_model=AdminOut)
 def read_admin(
     admin_id: int, 
     db: Session = Depends(get_db), 
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
     db_admin = crud_admin.get_admin(db, admin_id)
     if not db_admin:
@@ -89,7 +158,7 @@ def read_admin(
 def remove_admin(
     admin_id: int, 
     db: Session = Depends(get_db), 
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
     success = crud_admin.delete_admin(db, admin_id)
     if not success:
@@ -100,32 +169,37 @@ def remove_admin(
 def credit_account(
     account_id: int, 
     amount: float, 
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(get_db), 
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
-    account = get_account_by_id(db, account_id)
-    if not account:
-        raise HTTPException(status_code=404, detail="Account not found")
+    idem = idempotent_request(request, current_admin, idempotency_key)
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid amount")
 
     try:
-        # 1. Update SQL Balance
-        update_balance(db, account, amount)
+        # 0. Claim the Idempotency-Key (a replay is raised here, before any account row)
+        reserve_key(db, idem)
+
+        # 1. Update SQL Balance (single UPDATE ... RETURNING)
+        account = credit_balance(db, account_id, amount)
+        if not account:
+            raise HTTPException(status_code=404, detail="Account not found")
         
-        # 2. Call Node.js Microservice (Log as Deposit)
-        try:
-            requests.post(settings.TRANSACTION_SERVICE_URL, json={
-                "accountId": account.id,
-                "type": "deposit",
-                "amount": amount,
-                "details": f"Credited by Admin {current_admin.username}"
-            }, timeout=2)
-        except Exception as e:
-            print(f"Warning: Failed to save transaction history: {e}")
+        # 2. Write the ledger row and queue the Node.js Microservice notification (Log as Deposit)
+        record_transactions(db, [{
+            "account_id": account.id,
+            "type": "deposit",
+            "amount": amount,
+            "details": f"Credited by Admin {current_admin.username}"
+        }])
+        complete_key(db, idem, AccountResponse.model_validate(account).model_dump(mode="json"))
 
         db.commit()
-        db.refresh(account)
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Credit failed")
@@ -136,32 +210,39 @@ def credit_account(
 def debit_account(
     account_id: int, 
     amount: float, 
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(get_db), 
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
-    account = get_account_by_id(db, account_id)
-    if not account:
-        raise HTTPException(status_code=404, detail="Account not found")
-    if amount <= 0 or account.balance < amount:
+    idem = idempotent_request(request, current_admin, idempotency_key)
+    if amount <= 0:
         raise HTTPException(status_code=400, detail="Insufficient balance or invalid amount")
 
     try:
-        # 1. Update SQL Balance
-        update_balance(db, account, -amount)
+        # 0. Claim the Idempotency-Key (a replay is raised here, before any account row)
+        reserve_key(db, idem)
+
+        # 1. Update SQL Balance (balance check and debit in one statement, no race)
+        account = debit_balance(db, account_id, amount)
+        if not account:
+            if not get_account_by_id(db, account_id):
+                raise HTTPException(status_code=404, detail="Account not found")
+            raise HTTPException(status_code=400, detail="Insufficient balance or invalid amount")
         
-        # 2. Call Node.js Microservice (Log as Withdraw)
-        try:
-            requests.post(settings.TRANSACTION_SERVICE_URL, json={
-                "accountId": account.id,
-                "type": "withdraw",
-                "amount": amount,
-                "details": f"Debited by Admin {current_admin.username}"
-            }, timeout=2)
-        except Exception as e:
-            print(f"Warning: Failed to save transaction history: {e}")
+        # 2. Write the ledger row and queue the Node.js Microservice notification (Log as Withdraw)
+        record_transactions(db, [{
+            "account_id": account.id,
+            "type": "withdraw",
+            "amount": amount,
+            "details": f"Debited by Admin {current_admin.username}"
+        }])
+        complete_key(db, idem, AccountResponse.model_validate(account).model_dump(mode="json"))
 
         db.commit()
-        db.refresh(account)
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Debit failed")
@@ -172,22 +253,72 @@ def debit_account(
 def remove_customer(
     customer_id: int, 
     db: Session = Depends(get_db), 
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
-    customer = get_customer_by_id(db, customer_id)
-    if not customer:
+    # One transaction, set-based: the customer and accounts go together (the ledger is kept)
+    deleted, funded = purge_customers(db, [customer_id])
+    if customer_id in funded:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Customer has active account ({funded[customer_id]}) with funds. Cannot delete."
+        )
+    if not deleted:
         raise HTTPException(status_code=404, detail="Customer not found")
+    
+    return {"detail": "Customer and associated accounts deleted"}
 
-    for account in customer.accounts:
-        if account.balance > 0:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Customer has active account ({account.account_type}) with funds. Cannot delete."
-            )
+# --- NEW: Bulk Offboarding ---
+@router.post("/customers/purge", response_model=CustomerPurgeResponse)
+def purge_customer_batch(
+    payload: CustomerPurgeRequest,
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_principal)
+):
+    if len(payload.customer_ids) > settings.CUSTOMER_PURGE_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A purge may contain at most {settings.CUSTOMER_PURGE_MAX_IDS} customers"
+        )
 
-    for account in customer.accounts:
-        delete_account(db, account.id)
+    deleted, funded = purge_customers(db, payload.customer_ids)
+    skipped = [
+        CustomerPurgeSkip(
+            customer_id=customer_id,
+            detail=f"Customer has active account ({funded[customer_id]}) with funds"
+            if customer_id in funded else "Customer not found",
+        )
+        for customer_id in sorted(set(payload.customer_ids) - set(deleted))
+    ]
+    return CustomerPurgeResponse(deleted=deleted, skipped=skipped)
 
-    delete_customer(db, customer_id)
-    
-    return {"detail": "Customer and associated accounts deleted"}
\ No newline at end of file
+# --- NEW: Bulk Import (CSV or NDJSON, streamed) ---
+@router.post("/import", response_model=ImportReport)
+async def import_customer_records(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_principal)
+):
+    # Format from ?format=, else from the Content-Type (NDJSON / JSON lines, or CSV)
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "json" in content_type else "csv"
+    return await import_customers(request.stream(), format, db)
+
+# --- NEW: Periodic Balance Processing (interest / maintenance fees) ---
+@router.post("/batch/{job}")
+def run_balance_batch(
+    job: str,
+    period: str = Query(..., description="Calendar month, YYYY-MM"),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin_principal)
+):
+    if job not in JOBS:
+        raise HTTPException(status_code=404, detail="Unknown batch job")
+    if not PERIOD_PATTERN.match(period):
+        raise HTTPException(status_code=400, detail="Period must be YYYY-MM")
+    # Bounded per call so it finishes well inside proxy timeouts: while the
+    # status is "running", call again to resume from the checkpoint (no-op
+    # once completed; concurrent calls take turns on the run row)
+    return run_batch_job(db, job, period, dry_run=dry_run, max_chunks=settings.BATCH_MAX_CHUNKS_PER_REQUEST)
@@ -1,20 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.crud.admin import authenticate_admin
-from app.utils.auth_admin import create_admin_access_token
+from app.crud.admin import get_admin_by_username, update_admin_password
+from app.schemas.admin import Token
+from app.schemas.token import RefreshTokenRequest
+from app.utils.auth_admin import create_admin_access_token, create_admin_refresh_token, get_admin_principal
+from app.utils.revocation import rotate_refresh_token, revoke_refresh_token, invalid_refresh_token
+from app.utils.security import hash_password_async, verify_password_async, password_needs_rehash
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    admin = authenticate_admin(db, form_data.username, form_data.password)
-    if not admin:
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    # bcrypt runs in the password process pool; DB calls go through the threadpool
+    admin = await run_in_threadpool(get_admin_by_username, db, form_data.username)
+    if not admin or not await verify_password_async(form_data.password, admin.password):
         raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    # Transparently upgrade hashes created at an older bcrypt cost
+    if password_needs_rehash(admin.password):
+        new_hash = await hash_password_async(form_data.password)
+        await run_in_threadpool(update_admin_password, db, admin, new_hash)
     
     # UPDATED: Added "role": "admin" to the token payload
-    token = create_admin_access_token({"sub": str(admin.id), "role": "admin"})
+    claims = {"sub": str(admin.id), "role": "admin"}
+    token = create_admin_access_token(claims)
     
-    return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": token, "token_type": "bearer", "refresh_token": create_admin_refresh_token(claims)}
+
+# --- NEW: Refresh Token Flow (no password hashing) ---
+@router.post("/token/refresh", response_model=Token)
+def refresh_admin_token(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
+    # Rotation: the presented token is revoked and a new pair is issued
+    admin_id = rotate_refresh_token(db, payload.refresh_token, "admin")
+    if get_admin_principal(admin_id) is None:
+        raise invalid_refresh_token
+
+    claims = {"sub": str(admin_id), "role": "admin"}
+    return {
+        "access_token": create_admin_access_token(claims),
+        "token_type": "bearer",
+        "refresh_token": create_admin_refresh_token(claims),
+    }
+
+@router.post("/token/revoke", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_admin_token(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
+    revoke_refresh_token(db, payload.refresh_token, "admin")
+    return None
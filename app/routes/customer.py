@@ -1,21 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.core.database import get_db
 from app.schemas.customer import CustomerCreate, CustomerResponse, TokenResponse
+from app.schemas.token import RefreshTokenRequest
 from app.models.customer import Customer
-from app.crud.customer import create_customer, get_customer_by_email
-from app.utils.security import hash_password, verify_password
-# --- UPDATED IMPORT: Added get_current_customer ---
-from app.utils.auth_customer import create_customer_access_token, get_current_customer
+from app.crud.customer import create_customer, get_customer_by_email, get_customer_with_accounts, update_customer_password_hash
+from app.utils.security import hash_password_async, verify_password_async, password_needs_rehash
+from app.utils.auth_customer import (
+    create_customer_access_token,
+    create_customer_refresh_token,
+    get_current_customer_principal,
+    get_customer_principal,
+    credentials_exception,
+)
+from app.utils.principal import Principal
+from app.utils.revocation import rotate_refresh_token, revoke_refresh_token, invalid_refresh_token
 
 router = APIRouter(prefix="/customers", tags=["Customers"])
 
+# NOTE: register/login are async so bcrypt can be awaited in the password
+# process pool; their (sync) DB calls go through the threadpool.
+
 # --- Register new customer ---
 @router.post("/register", response_model=CustomerResponse)
-def register_customer(payload: CustomerCreate, db: Session = Depends(get_db)):
+async def register_customer(payload: CustomerCreate, db: Session = Depends(get_db)):
 
-    existing = get_customer_by_email(db, payload.email)
+    existing = await run_in_threadpool(get_customer_by_email, db, payload.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
@@ -24,41 +37,79 @@ def register_customer(payload: CustomerCreate, db: Session = Depends(get_db)):
         last_name=payload.last_name,
         email=payload.email,
         phone_number=payload.phone_number,
-        password_hash=hash_password(payload.password),
+        password_hash=await hash_password_async(payload.password),
     )
 
-    return create_customer(db, customer)
+    return await run_in_threadpool(_create_customer_response, db, customer)
+
+
+def _create_customer_response(db: Session, customer: Customer) -> CustomerResponse:
+    # Built here, in the threadpool: serializing the ORM row on the event loop
+    # would lazy-load its (always empty) accounts with a blocking query
+    created = create_customer(db, customer)
+    set_committed_value(created, "accounts", [])
+    return CustomerResponse.model_validate(created)
 
 
 # --- Login customer (OAuth2 password flow compatible) ---
 @router.post("/login", response_model=TokenResponse)
-def login_customer(
+async def login_customer(
     username: str = Form(...),  # Swagger OAuth2 expects 'username'
     password: str = Form(...),
     db: Session = Depends(get_db)
 ):
     # Treat username as email
-    customer = get_customer_by_email(db, username)
+    customer = await run_in_threadpool(get_customer_by_email, db, username)
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
-    if not verify_password(password, customer.password_hash):
+    if not await verify_password_async(password, customer.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
-    access_token = create_customer_access_token({
-        "sub": str(customer.id),
-        "role": "customer"
-    })
+    # Transparently upgrade hashes created at an older bcrypt cost
+    if password_needs_rehash(customer.password_hash):
+        new_hash = await hash_password_async(password)
+        await run_in_threadpool(update_customer_password_hash, db, customer, new_hash)
+
+    claims = {"sub": str(customer.id), "role": "customer"}
+    return TokenResponse(
+        access_token=create_customer_access_token(claims),
+        refresh_token=create_customer_refresh_token(claims),
+    )
 
-    return TokenResponse(access_token=access_token)
+# --- NEW: Refresh Token Flow (no password hashing) ---
+@router.post("/token/refresh", response_model=TokenResponse)
+def refresh_customer_token(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
+    # Rotation: the presented token is revoked and a new pair is issued
+    customer_id = rotate_refresh_token(db, payload.refresh_token, "customer")
+    if get_customer_principal(customer_id) is None:
+        raise invalid_refresh_token
+
+    claims = {"sub": str(customer_id), "role": "customer"}
+    return TokenResponse(
+        access_token=create_customer_access_token(claims),
+        refresh_token=create_customer_refresh_token(claims),
+    )
+
+@router.post("/token/revoke", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_customer_token(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
+    revoke_refresh_token(db, payload.refresh_token, "customer")
+    return None
 
 # --- NEW: Get Current User Profile ---
 @router.get("/me", response_model=CustomerResponse)
-def read_users_me(current_user: Customer = Depends(get_current_customer)):
-    return current_user
\ No newline at end of file
+def read_users_me(
+    current_customer: Principal = Depends(get_current_customer_principal),
+    db: Session = Depends(get_db),
+):
+    # Cached principal for auth, then one joined query for profile + accounts
+    customer = get_customer_with_accounts(db, current_customer.id)
+    if customer is None:
+        raise credentials_exception
+    return customer
\ No newline at end of file
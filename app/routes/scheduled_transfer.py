@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.core.database import get_db
+from app.schemas.scheduled_transfer import ScheduledTransferCreate, ScheduledTransferUpdate, ScheduledTransferResponse
+from app.crud.account import get_account_by_id, get_account_by_number
+from app.crud.scheduled_transfer import (
+    create_scheduled_transfer,
+    get_scheduled_transfers,
+    get_scheduled_transfer,
+    update_scheduled_transfer,
+    cancel_scheduled_transfer,
+)
+from app.utils.auth_customer import get_current_customer_principal
+from app.utils.principal import Principal
+
+# Standing orders. A router of its own so main.py can include it ahead of
+# both account routers, whose "/{account_id}" routes would otherwise
+# capture "/accounts/scheduled-transfers".
+router = APIRouter(prefix="/accounts/scheduled-transfers", tags=["Accounts"])
+
+@router.post("/", response_model=ScheduledTransferResponse, status_code=status.HTTP_201_CREATED)
+def create_standing_order(
+    payload: ScheduledTransferCreate,
+    db: Session = Depends(get_db),
+    current_customer: Principal = Depends(get_current_customer_principal)
+):
+    # Same up-front checks as /accounts/transfer; balance is checked per run
+    source = get_account_by_id(db, payload.from_account_id)
+    if not source or source.customer_id != current_customer.id:
+        raise HTTPException(status_code=404, detail="Source account not found")
+
+    target = get_account_by_number(db, payload.to_account_number)
+    if not target:
+        raise HTTPException(status_code=404, detail="Target account number not found")
+    if target.id == source.id:
+        raise HTTPException(status_code=400, detail="Cannot transfer to the same account")
+
+    return create_scheduled_transfer(
+        db,
+        current_customer.id,
+        source.id,
+        target.account_number,
+        payload.amount,
+        payload.frequency,
+        payload.start_at,
+    )
+
+@router.get("/", response_model=List[ScheduledTransferResponse])
+def list_standing_orders(
+    db: Session = Depends(get_db),
+    current_customer: Principal = Depends(get_current_customer_principal)
+):
+    return get_scheduled_transfers(db, current_customer.id)
+
+@router.get("/{transfer_id}", response_model=ScheduledTransferResponse)
+def get_standing_order(
+    transfer_id: int,
+    db: Session = Depends(get_db),
+    current_customer: Principal = Depends(get_current_customer_principal)
+):
+    item = get_scheduled_transfer(db, current_customer.id, transfer_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Scheduled transfer not found")
+    return item
+
+@router.patch("/{transfer_id}", response_model=ScheduledTransferResponse)
+def update_standing_order(
+    transfer_id: int,
+    payload: ScheduledTransferUpdate,
+    db: Session = Depends(get_db),
+    current_customer: Principal = Depends(get_current_customer_principal)
+):
+    item = get_scheduled_transfer(db, current_customer.id, transfer_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Scheduled transfer not found")
+    if item.status not in ("active", "paused"):
+        raise HTTPException(status_code=400, detail=f"Scheduled transfer is {item.status}")
+    return update_scheduled_transfer(db, item, amount=payload.amount, status=payload.status)
+
+@router.delete("/{transfer_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_standing_order(
+    transfer_id: int,
+    db: Session = Depends(get_db),
+    current_customer: Principal = Depends(get_current_customer_principal)
+):
+    item = get_scheduled_transfer(db, current_customer.id, transfer_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Scheduled transfer not found")
+    if item.status in ("active", "paused"):
+        cancel_scheduled_transfer(db, item)
+    return None
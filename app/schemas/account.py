@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class AccountCreate(BaseModel):
     account_type: str
@@ -12,4 +12,26 @@ class AccountResponse(BaseModel):
     status: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# --- Batch Transfers ---
+class TransferLeg(BaseModel):
+    to_account_number: str
+    amount: float
+
+class TransferBatchRequest(BaseModel):
+    from_account_id: int
+    legs: List[TransferLeg]
+
+class TransferLegResult(BaseModel):
+    to_account_number: str
+    amount: float
+    status: str  # "applied" or "rejected"
+    detail: Optional[str] = None
+
+class TransferBatchResponse(BaseModel):
+    from_account: AccountResponse
+    total_amount: float
+    applied_count: int
+    rejected_count: int
+    results: List[TransferLegResult]
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class AdminCreate(BaseModel):
     username: str
@@ -19,3 +20,4 @@ class AdminLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional
 from datetime import datetime # <--- Added Import
 
@@ -36,10 +36,53 @@ class CustomerResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# --- NEW: Keyset-paginated admin listing ---
+class CustomerPage(BaseModel):
+    items: List[CustomerResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page
+    next_offset: Optional[int] = None  # Search (?q=) only: pass back as ?offset=
+
+# --- NEW: Bulk offboarding ---
+class CustomerPurgeRequest(BaseModel):
+    customer_ids: List[int]
+
+class CustomerPurgeSkip(BaseModel):
+    customer_id: int
+    detail: str
+
+class CustomerPurgeResponse(BaseModel):
+    deleted: List[int]
+    skipped: List[CustomerPurgeSkip]
+
+# --- NEW: Bulk import (CSV / NDJSON rows) ---
+class CustomerImportRow(BaseModel):
+    first_name: str
+    last_name: str
+    email: EmailStr
+    phone_number: str
+    password: Optional[str] = None       # Hashed during the import
+    password_hash: Optional[str] = None  # Or an existing bcrypt hash (migrations)
+    account_type: Optional[str] = None   # Opens one account when set
+    opening_balance: float = Field(0.0, ge=0)
+
+class ImportRowError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class ImportReport(BaseModel):
+    rows: int
+    imported_customers: int
+    imported_accounts: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
+
 class CustomerLogin(BaseModel):
     email: EmailStr
     password: str
 
 class TokenResponse(BaseModel):
     access_token: str
-    token_type: str = "bearer"
\ No newline at end of file
+    token_type: str = "bearer"
+    refresh_token: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, field_validator
+
+Frequency = Literal["once", "daily", "weekly", "monthly"]
+
+class ScheduledTransferCreate(BaseModel):
+    from_account_id: int
+    to_account_number: str
+    amount: float = Field(..., gt=0)
+    frequency: Frequency
+    start_at: Optional[datetime] = None  # Defaults to now (first run on the next executor pass)
+
+    @field_validator("start_at")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Schedules are stored and compared as naive UTC (datetime.utcnow());
+        # an offset is converted, a naive value is taken as UTC already
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+class ScheduledTransferUpdate(BaseModel):
+    amount: Optional[float] = Field(None, gt=0)
+    status: Optional[Literal["active", "paused"]] = None  # Pause / resume
+
+class ScheduledTransferResponse(BaseModel):
+    id: int
+    from_account_id: int
+    to_account_number: str
+    amount: float
+    frequency: str
+    start_at: datetime
+    next_run_at: datetime
+    runs: int
+    status: str
+    last_run_at: Optional[datetime] = None
+    last_result: Optional[str] = None
+    last_error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class TransactionResponse(BaseModel):
+    id: int
+    account_id: int
+    type: str
+    amount: float
+    timestamp: datetime
+    details: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class TransactionPage(BaseModel):
+    items: List[TransactionResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page
@@ -0,0 +1,78 @@
+import re
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.batch import JOBS, get_batch_run, preview_job, process_chunk
+from app.services.workers import PeriodicWorker
+
+PERIOD_PATTERN = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+def previous_period(now: datetime) -> str:
+    """The calendar month before ``now`` as "YYYY-MM" (the one due for processing)."""
+    year, month = (now.year, now.month - 1) if now.month > 1 else (now.year - 1, 12)
+    return f"{year:04d}-{month:02d}"
+
+
+def run_batch_job(
+    db: Session, job: str, period: str, dry_run: bool = False, max_chunks: Optional[int] = None
+) -> dict:
+    """
+    Run (or resume) ``job`` for ``period`` to completion, or for at most
+    ``max_chunks`` chunks: the result then has status "running" and calling
+    again resumes from the checkpoint. Re-running a completed period is a
+    no-op that reports the stored totals.
+    """
+    chunk_size = settings.BATCH_CHUNK_SIZE
+    if dry_run:
+        existing = get_batch_run(db, job, period)
+        if existing is not None and existing.status == "completed":
+            remaining = {"accounts": 0, "total_amount": 0.0, "skipped": 0, "by_type": {}}
+        else:
+            remaining = preview_job(db, job, chunk_size, existing.last_account_id if existing else 0)
+        return {
+            "job": job,
+            "period": period,
+            "dry_run": True,
+            "status": existing.status if existing else "pending",
+            **remaining,
+        }
+
+    skipped = chunks = 0
+    while True:
+        run, chunk_skipped = process_chunk(db, job, period, chunk_size)
+        skipped += chunk_skipped
+        chunks += 1
+        if run.status == "completed" or (max_chunks is not None and chunks >= max_chunks):
+            break
+    return {
+        "job": job,
+        "period": period,
+        "dry_run": False,
+        "status": run.status,
+        "accounts": run.accounts_processed,
+        "total_amount": run.total_amount,
+        "last_account_id": run.last_account_id,
+        "skipped": skipped,
+    }
+
+
+def run_scheduled_jobs():
+    period = previous_period(datetime.utcnow())
+    db = SessionLocal()
+    try:
+        for job in JOBS:
+            run_batch_job(db, job, period)
+    finally:
+        db.close()
+
+
+batch_worker = PeriodicWorker(
+    "batch-scheduler",
+    settings.BATCH_SCHEDULER_INTERVAL_SECONDS,
+    run_scheduled_jobs,
+)
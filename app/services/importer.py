@@ -0,0 +1,183 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.customer import bulk_create_customers, existing_emails
+from app.schemas.customer import CustomerImportRow
+from app.utils.security import hash_passwords_bulk, is_password_hash
+
+# --- Streaming customer/account import ---
+# The body is read incrementally and handled IMPORT_CHUNK_SIZE rows at a time
+# (one dedupe query, one hashing fan-out and one bulk write per chunk), so
+# memory stays flat however large the upload is. Each chunk commits on its
+# own; the report says which rows did not make it.
+
+
+class ImportRun:
+    def __init__(self):
+        self.rows = 0
+        self.imported_customers = 0
+        self.imported_accounts = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.errors_truncated = False
+
+    def fail(self, row: int, error: str, email: str = None):
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "email": email, "error": error})
+        else:
+            self.errors_truncated = True
+
+    def report(self) -> dict:
+        return {
+            "rows": self.rows,
+            "imported_customers": self.imported_customers,
+            "imported_accounts": self.imported_accounts,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.errors_truncated,
+        }
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_records(stream: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, object]]:
+    """
+    (row number, dict) for each non-blank record, or (row number, error
+    message) when the line cannot be parsed. CSV needs a header line; quoted
+    fields cannot span lines.
+    """
+    header = None
+    row = 0
+    async for line in iter_lines(stream):
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row += 1
+            if len(values) != len(header):
+                yield row, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield row, {name: value for name, value in zip(header, values) if value != ""}
+        else:
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield row, "Invalid JSON"
+                continue
+            yield row, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+def _write_chunk(db: Session, rows: List[dict]) -> Tuple[int, int]:
+    try:
+        return bulk_create_customers(db, rows)
+    except Exception:
+        db.rollback()
+        raise
+
+
+async def _import_chunk(db: Session, chunk: List[Tuple[int, CustomerImportRow]], run: ImportRun):
+    # Duplicates inside the chunk, then against the database (one IN query)
+    seen: Dict[str, int] = {}
+    unique: List[Tuple[int, CustomerImportRow]] = []
+    for row, record in chunk:
+        if record.email in seen:
+            run.fail(row, f"Duplicate email (row {seen[record.email]})", record.email)
+            continue
+        seen[record.email] = row
+        unique.append((row, record))
+
+    taken = await run_in_threadpool(existing_emails, db, list(seen))
+    candidates = []
+    for row, record in unique:
+        if record.email in taken:
+            run.fail(row, "Email already registered", record.email)
+        else:
+            candidates.append((row, record))
+
+    # Plain passwords are hashed in the process pool, a few per job
+    to_hash = [record.password for _, record in candidates if not record.password_hash]
+    hashes = iter(await hash_passwords_bulk(to_hash)) if to_hash else iter(())
+    rows = []
+    for _, record in candidates:
+        data = record.model_dump(exclude={"password"})
+        data["password_hash"] = record.password_hash or next(hashes)
+        rows.append(data)
+
+    for attempt in range(2):
+        try:
+            customers, accounts = await run_in_threadpool(_write_chunk, db, rows)
+            run.imported_customers += customers
+            run.imported_accounts += accounts
+            return
+        except IntegrityError as e:
+            if attempt:
+                for row, record in candidates:
+                    run.fail(row, f"Chunk could not be written: {e.orig}", record.email)
+                return
+            # A concurrent registration (or an account-number clash): drop
+            # newly taken emails and retry once with fresh account numbers
+            taken = await run_in_threadpool(existing_emails, db, [record.email for _, record in candidates])
+            kept = []
+            for (row, record), data in zip(candidates, rows):
+                if record.email in taken:
+                    run.fail(row, "Email already registered", record.email)
+                else:
+                    kept.append(((row, record), data))
+            candidates = [pair for pair, _ in kept]
+            rows = [data for _, data in kept]
+
+
+async def import_customers(stream: AsyncIterator[bytes], fmt: str, db: Session) -> dict:
+    run = ImportRun()
+    chunk: List[Tuple[int, CustomerImportRow]] = []
+    async for row, record in iter_records(stream, fmt):
+        run.rows += 1
+        if isinstance(record, str):
+            run.fail(row, record)
+            continue
+        try:
+            parsed = CustomerImportRow(**record)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            run.fail(row, f"{field}: {error['msg']}" if field else error["msg"], record.get("email"))
+            continue
+        if not parsed.password and not parsed.password_hash:
+            run.fail(row, "password or password_hash is required", parsed.email)
+            continue
+        if parsed.password_hash and not is_password_hash(parsed.password_hash):
+            run.fail(row, "password_hash is not a supported hash", parsed.email)
+            continue
+
+        chunk.append((row, parsed))
+        if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+            await _import_chunk(db, chunk, run)
+            chunk = []
+
+    if chunk:
+        await _import_chunk(db, chunk, run)
+    return run.report()
@@ -0,0 +1,81 @@
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.outbox import claim_pending_events, delete_events, mark_failed
+from app.services.transaction_client import CircuitOpenError, transaction_client
+from app.services.workers import PeriodicWorker
+
+
+def _mark_failed(db, event, error: Exception):
+    mark_failed(
+        db,
+        event,
+        str(error),
+        settings.OUTBOX_MAX_ATTEMPTS,
+        settings.OUTBOX_BACKOFF_BASE_SECONDS,
+        settings.OUTBOX_BACKOFF_MAX_SECONDS,
+    )
+
+
+def dispatch_batch(batch_size: int) -> int:
+    """
+    Deliver one batch of due outbox events to the transaction service.
+
+    Delivered rows are deleted and failed rows are rescheduled with
+    exponential backoff, all in one commit. A crash between delivery and
+    commit re-sends the batch, so delivery is at-least-once.
+    Returns the number of events claimed.
+    """
+    # Don't even touch the table while the service is known to be down
+    if transaction_client.breaker.is_open():
+        return 0
+
+    db = SessionLocal()
+    try:
+        events = claim_pending_events(db, batch_size)
+        delivered = []
+
+        pending = events
+        if events and transaction_client.supports_batch:
+            # One request for the whole batch (both receipts of a transfer included)
+            try:
+                transaction_client.send_batch([event.payload for event in events])
+                delivered = [event.id for event in events]
+                pending = []
+            except CircuitOpenError:
+                pending = []
+            except Exception:
+                # One rejected event must not hold back the rest: resend them
+                # one by one so only the failing ones are charged an attempt
+                pass
+
+        for event in pending:
+            try:
+                transaction_client.send(event.payload)
+                delivered.append(event.id)
+            except CircuitOpenError:
+                # Leave the rest due; they are not charged an attempt
+                break
+            except Exception as e:
+                _mark_failed(db, event, e)
+
+        delete_events(db, delivered)
+        db.commit()
+        return len(delivered)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def drain_outbox():
+    # Keep going while full batches are delivered so a backlog clears quickly
+    while dispatch_batch(settings.OUTBOX_BATCH_SIZE) >= settings.OUTBOX_BATCH_SIZE:
+        pass
+
+
+outbox_worker = PeriodicWorker(
+    "outbox-dispatcher",
+    settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    drain_outbox,
+)
@@ -0,0 +1,33 @@
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.scheduled_transfer import execute_due_batch
+from app.services.workers import PeriodicWorker
+
+
+def run_due_transfers() -> dict:
+    """Drain everything due right now, one committed batch at a time."""
+    totals = {"claimed": 0, "applied": 0, "rejected": 0}
+    db = SessionLocal()
+    try:
+        while True:
+            counts = execute_due_batch(db, settings.SCHEDULED_TRANSFER_BATCH_SIZE)
+            for key, value in counts.items():
+                totals[key] += value
+            if counts["claimed"] < settings.SCHEDULED_TRANSFER_BATCH_SIZE:
+                return totals
+            # Batches are independent; keep the identity map from growing
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+# Executors share nothing but the table, so any number of them (threads here,
+# or other app instances) can drain it together
+scheduled_transfer_workers = [
+    PeriodicWorker(
+        f"scheduled-transfers-{i}",
+        settings.SCHEDULED_TRANSFER_INTERVAL_SECONDS,
+        run_due_transfers,
+    )
+    for i in range(settings.SCHEDULED_TRANSFER_WORKERS)
+]
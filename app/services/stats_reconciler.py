@@ -0,0 +1,21 @@
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.stats import reconcile_stats
+from app.services.workers import PeriodicWorker
+
+
+def run_reconciliation():
+    db = SessionLocal()
+    try:
+        fixed = reconcile_stats(db)
+        if fixed:
+            print(f"Warning: corrected drift in {fixed} dashboard counter(s)")
+    finally:
+        db.close()
+
+
+stats_worker = PeriodicWorker(
+    "stats-reconciler",
+    settings.STATS_RECONCILE_INTERVAL_SECONDS,
+    run_reconciliation,
+)
@@ -0,0 +1,126 @@
+import threading
+import time
+from typing import List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the service while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    every call fails fast. Once ``reset_timeout`` has passed a single probe
+    is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """True while calls would fail fast (open and not yet due for a probe)."""
+        with self._lock:
+            return self.state == "open" and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class TransactionServiceClient:
+    """Keep-alive HTTP client for the Node.js transaction service."""
+
+    def __init__(
+        self,
+        url: str,
+        batch_url: Optional[str],
+        timeout: float,
+        pool_connections: int,
+        pool_maxsize: int,
+        breaker: CircuitBreaker,
+    ):
+        self.url = url
+        self.batch_url = batch_url
+        self.timeout = timeout
+        self.breaker = breaker
+
+        # Retries are the outbox's job, so the adapter never retries itself
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @property
+    def supports_batch(self) -> bool:
+        return bool(self.batch_url)
+
+    def send(self, payload: dict):
+        self._post(self.url, payload)
+
+    def send_batch(self, payloads: List[dict]):
+        """Deliver several events (e.g. both receipts of a transfer) in one request."""
+        if not self.batch_url:
+            raise RuntimeError("TRANSACTION_SERVICE_BATCH_URL is not configured")
+        self._post(self.batch_url, payloads)
+
+    def _post(self, url: str, body):
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Transaction service circuit is open")
+        try:
+            response = self.session.post(url, json=body, timeout=self.timeout)
+            if response.status_code >= 500:
+                response.raise_for_status()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        # The service answered: a 4xx rejects this request, not the service
+        self.breaker.record_success()
+        response.raise_for_status()
+
+
+# Shared, module-level client so every caller reuses the same connection pool
+transaction_client = TransactionServiceClient(
+    url=settings.TRANSACTION_SERVICE_URL,
+    batch_url=settings.TRANSACTION_SERVICE_BATCH_URL,
+    timeout=settings.TRANSACTION_SERVICE_TIMEOUT_SECONDS,
+    pool_connections=settings.TRANSACTION_SERVICE_POOL_CONNECTIONS,
+    pool_maxsize=settings.TRANSACTION_SERVICE_POOL_MAXSIZE,
+    breaker=CircuitBreaker(
+        settings.TRANSACTION_SERVICE_BREAKER_FAILURE_THRESHOLD,
+        settings.TRANSACTION_SERVICE_BREAKER_RESET_SECONDS,
+    ),
+)
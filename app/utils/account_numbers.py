@@ -0,0 +1,131 @@
+import hashlib
+import hmac
+import threading
+from typing import List, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.counter import Counter
+
+# --- Account number allocation ---
+# Account numbers are 9 digits: an 8-digit payload plus a Luhn check digit.
+# The payload is a keyed permutation (Feistel network) of a counter value,
+# so numbers are unique by construction and do not look sequential. Counter
+# values are reserved from the database in blocks, so most allocations never
+# leave the process.
+
+PAYLOAD_DIGITS = 8
+PAYLOAD_SPACE = 10 ** PAYLOAD_DIGITS
+_HALF = 10 ** (PAYLOAD_DIGITS // 2)
+FEISTEL_ROUNDS = 4
+
+COUNTER_NAME = "account_number"
+
+
+class AccountNumbersExhausted(Exception):
+    """Raised when all 10^8 payloads have been handed out."""
+
+
+def _round_value(key: bytes, round_index: int, value: int) -> int:
+    digest = hmac.new(key, f"{round_index}:{value}".encode("ascii"), hashlib.sha256).digest()
+    return int.from_bytes(digest[:8], "big") % _HALF
+
+
+def permute(value: int, key: bytes) -> int:
+    """Bijection on [0, 10^8): a balanced Feistel network over two 4-digit halves."""
+    left, right = divmod(value, _HALF)
+    for i in range(FEISTEL_ROUNDS):
+        left, right = right, (left + _round_value(key, i, right)) % _HALF
+    return left * _HALF + right
+
+
+def luhn_check_digit(digits: str) -> str:
+    total = 0
+    # Double every second digit counting from the right of the full number,
+    # i.e. starting with the rightmost payload digit
+    for i, ch in enumerate(reversed(digits)):
+        d = int(ch)
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_account_number(number: str) -> bool:
+    return (
+        len(number) == PAYLOAD_DIGITS + 1
+        and number.isdigit()
+        and luhn_check_digit(number[:-1]) == number[-1]
+    )
+
+
+def format_account_number(value: int, key: bytes) -> str:
+    payload = f"{permute(value, key):0{PAYLOAD_DIGITS}d}"
+    return payload + luhn_check_digit(payload)
+
+
+class AccountNumberAllocator:
+    """
+    Hands out account numbers from per-process blocks of counter values.
+
+    A block is reserved with one UPDATE ... RETURNING on the counters row in
+    its own short transaction (never the caller's), so the row lock is not
+    held for the rest of a request. Values left in a block when the process
+    exits are simply skipped.
+    """
+
+    def __init__(self, key: bytes, block_size: int):
+        self.key = key
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self, size: int) -> Tuple[int, int]:
+        stmt = (
+            update(Counter)
+            .where(Counter.name == COUNTER_NAME)
+            .values(value=Counter.value + size)
+            .returning(Counter.value)
+        )
+        with engine.begin() as conn:
+            end = conn.execute(stmt).scalar()
+        if end is None:
+            # First allocation ever: create the row (another worker may win the race)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(Counter).values(name=COUNTER_NAME, value=0))
+            except IntegrityError:
+                pass
+            with engine.begin() as conn:
+                end = conn.execute(stmt).scalar()
+        if end > PAYLOAD_SPACE:
+            raise AccountNumbersExhausted()
+        return end - size, end
+
+    def allocate(self, count: int = 1) -> List[str]:
+        """``count`` fresh account numbers; at most one DB round trip."""
+        values: List[int] = []
+        with self._lock:
+            if self._end - self._next < count:
+                # Use up the current block, then reserve the rest in one go
+                values.extend(range(self._next, self._end))
+                self._next, self._end = self._reserve(max(self.block_size, count - len(values)))
+            take = count - len(values)
+            values.extend(range(self._next, self._next + take))
+            self._next += take
+        return [format_account_number(value, self.key) for value in values]
+
+    def allocate_one(self) -> str:
+        return self.allocate(1)[0]
+
+
+account_numbers = AccountNumberAllocator(
+    key=(settings.ACCOUNT_NUMBER_KEY or settings.JWT_SECRET_KEY).encode("utf-8"),
+    block_size=settings.ACCOUNT_NUMBER_BLOCK_SIZE,
+)
@@ -1,36 +1,61 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.models.admin import Admin
 from app.core.config import settings
+from app.utils.principal import Principal, get_principal
 # --- NEW: Use shared token generator ---
+from app.utils.jwt import decode_token
 from app.utils.jwt import create_access_token as create_admin_access_token
+from app.utils.jwt import create_refresh_token as create_admin_refresh_token
 
 # OAuth2 scheme for admin login
 admin_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/admin/login", scheme_name="AdminOAuth2")
 
-# Dependency to get current logged-in admin
-def get_current_admin(token: str = Depends(admin_oauth2_scheme), db: Session = Depends(get_db)) -> Admin:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def decode_admin_id(token: str) -> int:
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        payload = decode_token(token)
         admin_id: str | None = payload.get("sub")
         role: str | None = payload.get("role")
         
-        if admin_id is None or role != "admin":
+        # Refresh tokens carry the same claims but are only valid at /token/refresh
+        if admin_id is None or role != "admin" or payload.get("type") == "refresh":
             raise credentials_exception
             
     except JWTError:
         raise credentials_exception
+    return int(admin_id)
 
-    admin = db.query(Admin).filter(Admin.id == int(admin_id)).first()
+# Dependency to get current logged-in admin
+def get_current_admin(token: str = Depends(admin_oauth2_scheme), db: Session = Depends(get_db)) -> Admin:
+    admin = db.query(Admin).filter(Admin.id == decode_admin_id(token)).first()
     if admin is None:
         raise credentials_exception
-    return admin
\ No newline at end of file
+    return admin
+
+# --- NEW: Lightweight principal (cached, no DB query on a hit) ---
+def _load_admin_principal(admin_id: int):
+    db = SessionLocal()
+    try:
+        admin = db.query(Admin).filter(Admin.id == admin_id).first()
+        return Principal.from_admin(admin) if admin else None
+    finally:
+        db.close()
+
+def get_admin_principal(admin_id: int) -> Principal | None:
+    return get_principal("admin", admin_id, lambda: _load_admin_principal(admin_id))
+
+def get_current_admin_principal(token: str = Depends(admin_oauth2_scheme)) -> Principal:
+    principal = get_admin_principal(decode_admin_id(token))
+    if principal is None:
+        raise credentials_exception
+    return principal
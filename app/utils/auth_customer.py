@@ -1,35 +1,75 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal, AsyncSessionLocal
 from app.models.customer import Customer
 from app.crud.customer import get_customer_by_id
+from app.crud import async_customer
 from app.core.config import settings
+from app.utils.principal import Principal, get_principal, get_principal_async
 # --- NEW: Use shared token generator ---
+from app.utils.jwt import decode_token
 from app.utils.jwt import create_access_token as create_customer_access_token
+from app.utils.jwt import create_refresh_token as create_customer_refresh_token
 
 # OAuth2 scheme for customer login
 customer_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/customers/login", scheme_name="CustomerOAuth2")
 
-# Dependency to get current logged-in customer
-def get_current_customer(token: str = Depends(customer_oauth2_scheme), db: Session = Depends(get_db)) -> Customer:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def decode_customer_id(token: str) -> int:
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        payload = decode_token(token)
         customer_id: str | None = payload.get("sub")
         role: str | None = payload.get("role")
-        if customer_id is None or role != "customer":
+        # Refresh tokens carry the same claims but are only valid at /token/refresh
+        if customer_id is None or role != "customer" or payload.get("type") == "refresh":
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    return int(customer_id)
 
-    customer = get_customer_by_id(db, int(customer_id))
+# Dependency to get current logged-in customer (full ORM row, e.g. for /customers/me)
+def get_current_customer(token: str = Depends(customer_oauth2_scheme), db: Session = Depends(get_db)) -> Customer:
+    customer = get_customer_by_id(db, decode_customer_id(token))
     if customer is None:
         raise credentials_exception
-    return customer
\ No newline at end of file
+    return customer
+
+# --- NEW: Lightweight principal (cached, no DB query on a hit) ---
+# Use this whenever a route only needs the caller's id.
+def _load_customer_principal(customer_id: int):
+    db = SessionLocal()
+    try:
+        customer = get_customer_by_id(db, customer_id)
+        return Principal.from_customer(customer) if customer else None
+    finally:
+        db.close()
+
+def get_customer_principal(customer_id: int) -> Principal | None:
+    return get_principal("customer", customer_id, lambda: _load_customer_principal(customer_id))
+
+def get_current_customer_principal(token: str = Depends(customer_oauth2_scheme)) -> Principal:
+    principal = get_customer_principal(decode_customer_id(token))
+    if principal is None:
+        raise credentials_exception
+    return principal
+
+# Async variant for the async routes (settings.DATABASE_ASYNC_MODE)
+async def _load_customer_principal_async(customer_id: int):
+    async with AsyncSessionLocal() as db:
+        customer = await async_customer.get_customer_by_id(db, customer_id)
+    return Principal.from_customer(customer) if customer else None
+
+async def get_current_customer_principal_async(token: str = Depends(customer_oauth2_scheme)) -> Principal:
+    customer_id = decode_customer_id(token)
+    principal = await get_principal_async("customer", customer_id, lambda: _load_customer_principal_async(customer_id))
+    if principal is None:
+        raise credentials_exception
+    return principal
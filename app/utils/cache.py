@@ -0,0 +1,258 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries also expire.
+
+    Entries live for ``ttl`` seconds unless ``set`` is given an explicit
+    ``expires_at`` (a ``time.time()`` timestamp). When full, the least
+    recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None):
+        if expires_at is None:
+            expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+# --- Read-through caching with single-flight ---
+# Backends store JSON-friendly values under string keys. The in-process one
+# is a TTLCache; the shared one talks to anything with the redis-py
+# get/set(px=)/delete interface (a real Redis, or MemoryRedis locally).
+
+class InProcessBackend:
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=0)
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key: str):
+        self._cache.invalidate(key)
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        return {"backend": "in-process", "size": stats["size"], "maxsize": stats["maxsize"]}
+
+
+class MemoryRedis:
+    """Single-process stand-in for a Redis client (the subset SharedBackend uses)."""
+
+    def __init__(self):
+        self._data: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name: str, value: Any, px: Optional[int] = None):
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        with self._lock:
+            self._data[name] = (time.time() + px / 1000 if px else None, value)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+
+class SharedBackend:
+    def __init__(self, client, prefix: str = "bms:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def stats(self) -> dict:
+        return {"backend": type(self.client).__name__}
+
+
+def backend_from_url(url: Optional[str], maxsize: int):
+    """None -> in-process; "memory://" -> SharedBackend over MemoryRedis; else a Redis URL."""
+    if not url:
+        return InProcessBackend(maxsize)
+    if url.startswith("memory://"):
+        return SharedBackend(MemoryRedis())
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError("CACHE_BACKEND_URL points at Redis but the 'redis' package is not installed") from e
+    return SharedBackend(redis.Redis.from_url(url))
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ReadThroughCache:
+    """
+    Per-endpoint cache: ``ttl`` seconds per entry, and concurrent misses on the
+    same key share one computation (single-flight). ``None`` results and
+    exceptions are handed to the waiting callers but never stored.
+
+    ``invalidate`` bumps a generation counter so a computation that started
+    before the invalidation cannot store its (possibly stale) result.
+    """
+
+    def __init__(self, name: str, ttl: float, backend):
+        self.name = name
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._flights: dict = {}
+        self._async_flights: dict = {}
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _store(self, key: str, value: Any, generation: int):
+        if value is not None and generation == self._generation:
+            self.backend.set(self._key(key), value, self.ttl)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.backend.get(self._key(key))
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            self._store(key, flight.value, generation)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def get_or_compute_async(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Event-loop variant; ``compute`` is a coroutine function."""
+        value = self.backend.get(self._key(key))
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        future = self._async_flights.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = self._async_flights[key] = asyncio.get_running_loop().create_future()
+        generation = self._generation
+        try:
+            value = await compute()
+            self._store(key, value, generation)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not log a warning
+            future.exception()
+            raise
+        finally:
+            self._async_flights.pop(key, None)
+
+    def invalidate(self, *keys: str):
+        with self._lock:
+            self._generation += 1
+        for key in keys:
+            self.backend.delete(self._key(key))
+
+    def stats(self) -> dict:
+        return {"ttl": self.ttl, "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, **self.backend.stats()}
@@ -0,0 +1,140 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.idempotency import insert_key, get_key, delete_expired_key, purge_expired_keys
+from app.models.idempotency_key import IdempotencyKey
+from app.services.workers import PeriodicWorker
+from app.utils.cache import TTLCache
+from app.utils.principal import Principal
+
+
+class IdempotentReplay(HTTPException):
+    """
+    Carries a stored response back to the client (rendered in main.py).
+
+    An HTTPException so the money-movement handlers' ``except HTTPException``
+    branch (rollback, re-raise) lets it through unchanged.
+    """
+
+    def __init__(self, status_code: int, content: Any):
+        super().__init__(status_code=status_code)
+        self.content = content
+
+
+@dataclass
+class IdempotentRequest:
+    scope: str        # Keys are per principal: "customer:<id>" / "admin:<id>"
+    key: str
+    fingerprint: str  # A key reused for a different request is rejected
+    row: Optional[IdempotencyKey] = None
+
+
+# (scope, key) -> (fingerprint, status_code, response). Only committed
+# responses go in, so a hit is served without touching the DB at all.
+idempotency_cache = TTLCache(settings.IDEMPOTENCY_CACHE_MAXSIZE, settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+
+
+def _fingerprint(request: Request) -> str:
+    # These endpoints take everything in the path and query string
+    raw = f"{request.method} {request.url.path}?{sorted(request.query_params.multi_items())}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _replay(fingerprint: str, stored_fingerprint: str, status_code: int, response: Any) -> HTTPException:
+    if stored_fingerprint != fingerprint:
+        return HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    return IdempotentReplay(status_code, response)
+
+
+def idempotent_request(request: Request, principal: Principal, key: Optional[str]) -> Optional[IdempotentRequest]:
+    """None without the header. A cached key raises its stored response right here."""
+    if key is None:
+        return None
+    if not key or len(key) > settings.IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+
+    idem = IdempotentRequest(scope=f"{principal.role}:{principal.id}", key=key, fingerprint=_fingerprint(request))
+    cached = idempotency_cache.get((idem.scope, idem.key))
+    if cached is not None:
+        raise _replay(idem.fingerprint, *cached)
+    return idem
+
+
+# --- Inside the balance-change transaction ---
+# reserve_key runs first, so a replay (or a concurrent duplicate, which waits
+# on the key's primary key) never reaches the account rows; complete_key
+# stores the response just before the commit. Failed requests roll the key
+# back with everything else and may be retried.
+def reserve_key(db: Session, idem: Optional[IdempotentRequest]):
+    if idem is None:
+        return
+    expires_at = datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    for _ in range(2):
+        try:
+            idem.row = insert_key(db, idem.scope, idem.key, idem.fingerprint, expires_at)
+            return
+        except IntegrityError:
+            db.rollback()
+        stored = get_key(db, idem.scope, idem.key)
+        if stored is not None and stored.expires_at > datetime.utcnow():
+            _remember(stored.scope, stored.key, stored.expires_at, stored.fingerprint, stored.status_code, stored.response)
+            raise _replay(idem.fingerprint, stored.fingerprint, stored.status_code, stored.response)
+        # Expired but not purged yet: the key is free again
+        delete_expired_key(db, idem.scope, idem.key)
+    raise HTTPException(status_code=409, detail="Idempotency-Key is in use, please retry")
+
+
+def complete_key(db: Session, idem: Optional[IdempotentRequest], response: Any, status_code: int = 200):
+    if idem is None:
+        return
+    idem.row.status_code = status_code
+    idem.row.response = response
+    db.info.setdefault("idempotency_responses", []).append(
+        (idem.scope, idem.key, idem.row.expires_at, idem.fingerprint, status_code, response)
+    )
+
+
+def _remember(scope: str, key: str, expires_at: datetime, fingerprint: str, status_code: int, response: Any):
+    # Never outlive the row: once it expires every worker must let the key be reused
+    ttl = (expires_at - datetime.utcnow()).total_seconds()
+    if ttl > 0:
+        idempotency_cache.set((scope, key), (fingerprint, status_code, response), ttl=ttl)
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_responses(session):
+    for entry in session.info.pop("idempotency_responses", ()):
+        _remember(*entry)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_uncommitted_responses(session):
+    session.info.pop("idempotency_responses", None)
+
+
+# --- Expiry ---
+def purge_expired():
+    db = SessionLocal()
+    try:
+        purge_expired_keys(db)
+    finally:
+        db.close()
+
+
+idempotency_purge_worker = PeriodicWorker(
+    "idempotency-purge",
+    settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+    purge_expired,
+)
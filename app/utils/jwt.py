@@ -1,6 +1,8 @@
+import uuid
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.utils.cache import TTLCache
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -17,3 +19,43 @@ def create_access_token(data: dict):
     )
 
     return encoded_jwt
+
+# --- NEW: Refresh Tokens ---
+# Long-lived, single-use (rotated on every refresh) and identified by "jti"
+# so they can be revoked. Marked with "type": "refresh" so they are never
+# accepted where an access token is expected.
+def create_refresh_token(data: dict):
+    to_encode = data.copy()
+
+    expire = datetime.utcnow() + timedelta(
+        days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS
+    )
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "refresh"})
+
+    return jwt.encode(
+        to_encode,
+        settings.JWT_SECRET_KEY,
+        algorithm=settings.JWT_ALGORITHM
+    )
+
+def decode_refresh_token(token: str) -> dict:
+    """Verified refresh-token claims; raises JWTError for anything else."""
+    payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    if payload.get("type") != "refresh" or not payload.get("jti") or not payload.get("sub"):
+        raise JWTError("Not a refresh token")
+    return payload
+
+# --- NEW: Verified-token cache ---
+# Maps the raw token string to its already-verified claims so repeated
+# requests with the same token skip base64/JSON parsing and the signature
+# check. Entries expire exactly at the token's "exp".
+token_cache = TTLCache(settings.TOKEN_CACHE_MAXSIZE, ttl=0)
+
+def decode_token(token: str) -> dict:
+    """jwt.decode with caching; raises JWTError for invalid or expired tokens."""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        if "exp" in claims:
+            token_cache.set(token, claims, expires_at=float(claims["exp"]))
+    return dict(claims)
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.admin import Admin
+from app.models.customer import Customer
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of an authenticated subject (no ORM state attached)."""
+    id: int
+    role: str      # "customer" or "admin"
+    username: str  # email for customers
+    status: str
+
+    @classmethod
+    def from_customer(cls, customer: Customer) -> "Principal":
+        return cls(id=customer.id, role="customer", username=customer.email, status=customer.status)
+
+    @classmethod
+    def from_admin(cls, admin: Admin) -> "Principal":
+        return cls(id=admin.id, role="admin", username=admin.username, status="active")
+
+
+principal_cache = TTLCache(settings.PRINCIPAL_CACHE_MAXSIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def _cached_principal(role: str, subject_id: int) -> Optional[Principal]:
+    return principal_cache.get((role, subject_id))
+
+
+def _remember_principal(role: str, subject_id: int, principal: Optional[Principal]):
+    if principal is not None:
+        principal_cache.set((role, subject_id), principal)
+
+
+def get_principal(role: str, subject_id: int, load: Callable[[], Optional[Principal]]) -> Optional[Principal]:
+    """Cached principal for (role, subject_id); ``load`` runs only on a miss."""
+    principal = _cached_principal(role, subject_id)
+    if principal is None:
+        principal = load()
+        _remember_principal(role, subject_id, principal)
+    return principal
+
+
+async def get_principal_async(
+    role: str, subject_id: int, load: Callable[[], Awaitable[Optional[Principal]]]
+) -> Optional[Principal]:
+    """get_principal for the async routes: same cache, ``load`` is awaited on a miss."""
+    principal = _cached_principal(role, subject_id)
+    if principal is None:
+        principal = await load()
+        _remember_principal(role, subject_id, principal)
+    return principal
+
+
+def invalidate_principal(role: str, subject_id: int):
+    principal_cache.invalidate((role, subject_id))
+
+
+# --- Invalidation on delete / status change ---
+# Entries are dropped at flush and again after commit, so a request that
+# re-reads the row in between cannot leave a stale snapshot behind.
+def queue_principal_invalidations(session: Session, role: str, subject_ids: Iterable[int]):
+    """For bulk (Core) deletes/updates, which do not fire the mapper events below."""
+    pending: Set[Tuple[str, int]] = session.info.setdefault("principal_invalidations", set())
+    for subject_id in subject_ids:
+        invalidate_principal(role, subject_id)
+        pending.add((role, subject_id))
+
+
+def _queue_invalidation(target, role: str):
+    session = object_session(target)
+    if session is not None:
+        queue_principal_invalidations(session, role, [target.id])
+    else:
+        invalidate_principal(role, target.id)
+
+
+@event.listens_for(Customer, "after_delete")
+def _customer_deleted(mapper, connection, target):
+    _queue_invalidation(target, "customer")
+
+
+@event.listens_for(Customer, "after_update")
+def _customer_updated(mapper, connection, target):
+    if inspect(target).attrs.status.history.has_changes():
+        _queue_invalidation(target, "customer")
+
+
+@event.listens_for(Admin, "after_delete")
+def _admin_deleted(mapper, connection, target):
+    _queue_invalidation(target, "admin")
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_invalidations(session):
+    for role, subject_id in session.info.pop("principal_invalidations", ()):
+        invalidate_principal(role, subject_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_invalidations(session):
+    session.info.pop("principal_invalidations", None)
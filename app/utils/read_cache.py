@@ -0,0 +1,91 @@
+from typing import Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.account import Account
+from app.models.customer import Customer
+from app.utils.cache import InProcessBackend, ReadThroughCache, backend_from_url
+
+# --- Hot read endpoints: short-TTL, single-flight caches ---
+_backend = backend_from_url(settings.CACHE_BACKEND_URL, settings.READ_CACHE_MAXSIZE)
+
+# /admin/stats (keys: "summary", "breakdown")
+stats_cache = ReadThroughCache("stats", settings.STATS_CACHE_TTL_SECONDS, _backend)
+STATS_KEYS = ("summary", "breakdown")
+
+# /accounts/lookup/{account_number} (key: the account number). Without a
+# shared backend it gets its own LRU, so polling traffic cannot evict it.
+lookup_cache = ReadThroughCache(
+    "lookup",
+    settings.LOOKUP_CACHE_TTL_SECONDS,
+    _backend if settings.CACHE_BACKEND_URL else InProcessBackend(settings.LOOKUP_CACHE_MAXSIZE),
+)
+
+
+def invalidate_stats():
+    stats_cache.invalidate(*STATS_KEYS)
+
+
+def invalidate_lookups(*account_numbers: str):
+    lookup_cache.invalidate(*account_numbers)
+
+
+# --- Invalidation ---
+# Counter changes (balances, account/customer creation and deletion) are
+# written at commit by app/crud/stats.py, which flags the session; the stats
+# entries are dropped once that commit succeeds. Lookups change only when an
+# account goes away or its owner is renamed or removed.
+def queue_lookup_invalidations(session: Session, account_numbers):
+    """For bulk (Core) deletes, which do not fire the mapper events below."""
+    invalidate_lookups(*account_numbers)
+    pending: Set[str] = session.info.setdefault("lookup_invalidations", set())
+    pending.update(account_numbers)
+
+
+def _queue_lookup_invalidation(target, account_numbers):
+    session = object_session(target)
+    if session is not None:
+        queue_lookup_invalidations(session, account_numbers)
+    else:
+        invalidate_lookups(*account_numbers)
+
+
+def _loaded_account_numbers(customer: Customer):
+    # Only what is already loaded; deleting a customer deletes its accounts first
+    if "accounts" in inspect(customer).dict:
+        return [account.account_number for account in customer.accounts]
+    return []
+
+
+@event.listens_for(Account, "after_delete")
+def _account_deleted(mapper, connection, target):
+    _queue_lookup_invalidation(target, [target.account_number])
+
+
+@event.listens_for(Customer, "after_delete")
+def _customer_deleted(mapper, connection, target):
+    _queue_lookup_invalidation(target, _loaded_account_numbers(target))
+
+
+@event.listens_for(Customer, "after_update")
+def _customer_updated(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.first_name.history.has_changes() or state.attrs.last_name.history.has_changes():
+        _queue_lookup_invalidation(target, _loaded_account_numbers(target))
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_invalidations(session):
+    if session.info.pop("stats_written", False):
+        invalidate_stats()
+    numbers = session.info.pop("lookup_invalidations", None)
+    if numbers:
+        invalidate_lookups(*numbers)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_invalidations(session):
+    session.info.pop("stats_written", None)
+    session.info.pop("lookup_invalidations", None)
@@ -0,0 +1,126 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from jose import JWTError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.revoked_token import revoke_token, get_active_revocations, get_revocations_since, purge_expired_revocations
+from app.services.workers import PeriodicWorker
+from app.utils.jwt import decode_refresh_token
+
+# Re-read a little before the last sync so rows committed slightly out of
+# timestamp order by other workers are not missed
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+def _epoch(utc_naive: datetime) -> float:
+    return utc_naive.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationIndex:
+    """
+    In-memory set of revoked refresh-token IDs, backed by revoked_tokens.
+
+    Lookups are O(1) and never touch the DB. Each worker loads the table at
+    startup and then pulls other workers' revocations incrementally.
+    """
+
+    def __init__(self):
+        self._expiry: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._synced_at: Optional[datetime] = None
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._expiry
+
+    def add(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self._expiry[jti] = _epoch(expires_at)
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def sync(self):
+        started = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            if self._synced_at is None:
+                rows = get_active_revocations(db)
+            else:
+                rows = get_revocations_since(db, self._synced_at - SYNC_OVERLAP)
+                purge_expired_revocations(db)
+        finally:
+            db.close()
+
+        now = time.time()
+        with self._lock:
+            for row in rows:
+                self._expiry[row.jti] = _epoch(row.expires_at)
+            for jti in [jti for jti, expires in self._expiry.items() if expires <= now]:
+                del self._expiry[jti]
+        self._synced_at = started
+
+
+revocation_index = RevocationIndex()
+
+revocation_worker = PeriodicWorker(
+    "revocation-sync",
+    settings.REVOCATION_SYNC_INTERVAL_SECONDS,
+    revocation_index.sync,
+)
+
+
+invalid_refresh_token = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Invalid or expired refresh token",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+def _verified_claims(token: str, role: str) -> dict:
+    try:
+        payload = decode_refresh_token(token)
+    except JWTError:
+        raise invalid_refresh_token
+    if payload.get("role") != role or payload["jti"] in revocation_index:
+        raise invalid_refresh_token
+    return payload
+
+
+def rotate_refresh_token(db: Session, token: str, role: str) -> int:
+    """
+    Spend a refresh token: verify it, check the in-memory revocation index,
+    then revoke its jti so it cannot be used again. Returns the subject id.
+    If the same token is presented twice concurrently only one call wins.
+    """
+    payload = _verified_claims(token, role)
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    try:
+        revoke_token(db, payload["jti"], expires_at)
+    except IntegrityError:
+        db.rollback()
+        raise invalid_refresh_token
+    revocation_index.add(payload["jti"], expires_at)
+    return int(payload["sub"])
+
+
+def revoke_refresh_token(db: Session, token: str, role: str):
+    """Logout: revoke a refresh token (a no-op if it was already revoked)."""
+    try:
+        payload = decode_refresh_token(token)
+    except JWTError:
+        raise invalid_refresh_token
+    if payload.get("role") != role or payload["jti"] in revocation_index:
+        return
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    try:
+        revoke_token(db, payload["jti"], expires_at)
+    except IntegrityError:
+        db.rollback()
+    revocation_index.add(payload["jti"], expires_at)
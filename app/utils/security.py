@@ -1,7 +1,23 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
 # --- Password Hashing ---
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds == default_rounds makes needs_update() flag hashes made at an
+# older (lower) cost so they can be upgraded on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def hash_password(password: str) -> str:
     # Truncate to 72 bytes to avoid bcrypt limitation
@@ -12,4 +28,91 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     # --- FIX: Truncate here too ---
     # We must compare the hash of the *truncated* input against the stored hash.
     truncated = plain_password.encode("utf-8")[:72].decode("utf-8", errors="ignore")
-    return pwd_context.verify(truncated, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(truncated, hashed_password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
+def is_password_hash(value: str) -> bool:
+    """True for hashes this context can verify (e.g. pre-hashed bcrypt from a migration)."""
+    return pwd_context.identify(value, required=False) is not None
+
+# --- NEW: Off-thread hashing in a bounded process pool ---
+# bcrypt is ~250ms of CPU holding the GIL; running it in worker processes
+# keeps the event loop and the threadpool free for everything else.
+class PasswordHashingBusy(Exception):
+    """Raised when too many hash/verify jobs are already queued."""
+
+# The pool starts (and grows) while the app's worker threads are running, so
+# its processes must not be forked from this process: a child could inherit a
+# lock some other thread was holding and hang. forkserver forks them from a
+# clean single-threaded server; spawn where that is unavailable.
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context(_START_METHOD),
+            )
+        return _executor
+
+async def _run_in_pool(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise PasswordHashingBusy()
+    try:
+        return await asyncio.wrap_future(_get_executor().submit(fn, *args))
+    finally:
+        _pending.release()
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_pool(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+# --- Bulk hashing (imports) ---
+# Work is sent in small slices, each holding a PASSWORD_HASH_MAX_PENDING slot
+# like any interactive job, and imports never occupy every worker: logins
+# queued behind an import wait for at most one slice, and still get a 503
+# rather than an unbounded queue when the pool is saturated.
+HASH_SLICE_SIZE = 8
+PENDING_RETRY_SECONDS = 0.05
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    return [hash_password(password) for password in passwords]
+
+async def _acquire_pending_slot():
+    # Imports wait for a slot instead of failing like interactive requests do
+    while not _pending.acquire(blocking=False):
+        await asyncio.sleep(PENDING_RETRY_SECONDS)
+
+async def hash_passwords_bulk(passwords: List[str]) -> List[str]:
+    executor = _get_executor()
+    workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+    in_flight = asyncio.Semaphore(max(1, workers - 1))
+
+    async def run_slice(chunk: List[str]) -> List[str]:
+        async with in_flight:
+            await _acquire_pending_slot()
+            try:
+                return await asyncio.wrap_future(executor.submit(_hash_many, chunk))
+            finally:
+                _pending.release()
+
+    slices = [passwords[i:i + HASH_SLICE_SIZE] for i in range(0, len(passwords), HASH_SLICE_SIZE)]
+    results = await asyncio.gather(*(run_slice(chunk) for chunk in slices))
+    return [hashed for chunk in results for hashed in chunk]
+
+def shutdown_password_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,81 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# Settings are read at import time, so the test environment goes in first
+_db_dir = tempfile.mkdtemp(prefix="bms-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test.db")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("TRANSACTION_SERVICE_URL", "http://127.0.0.1:9/transactions")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# No background workers: they would add statements to the counts
+os.environ.setdefault("OUTBOX_DISPATCHER_ENABLED", "false")
+os.environ.setdefault("STATS_RECONCILE_ENABLED", "false")
+os.environ.setdefault("SCHEDULED_TRANSFER_ENABLED", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.core.database import engine as app_engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def engine():
+    assert app_engine.dialect.name == "sqlite"
+    return app_engine
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    r = client.post("/admin/login", data={"username": "admin", "password": "admin123"})
+    assert r.status_code == 200, r.text
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    # Warm the principal cache so counted requests do not include the auth lookup
+    assert client.get("/admin/stats", headers=headers).status_code == 200
+    return headers
+
+
+@pytest.fixture
+def register_customer(client):
+    """Register and log in a customer with ``accounts`` accounts; returns auth headers."""
+    def register(email: str, accounts: int = 0) -> dict:
+        r = client.post("/customers/register", json={
+            "first_name": "Test", "last_name": "Customer", "email": email, "phone_number": "1", "password": "pw",
+        })
+        assert r.status_code == 200, r.text
+        r = client.post("/customers/login", data={"username": email, "password": "pw"})
+        assert r.status_code == 200, r.text
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        for _ in range(accounts):
+            assert client.post("/accounts/", json={"account_type": "savings"}, headers=headers).status_code == 200
+        return headers
+    return register
+
+
+@pytest.fixture
+def count_queries(engine):
+    """``with count_queries() as statements:`` collects every SQL statement run on the engine."""
+    @contextmanager
+    def counting():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return counting
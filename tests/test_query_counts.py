@@ -0,0 +1,61 @@
+"""Query counts stay constant however many customers / accounts a response holds (no N+1)."""
+from app.core.database import SessionLocal
+from app.crud.customer import search_customers
+
+
+def test_me_is_one_query_regardless_of_accounts(client, register_customer, count_queries):
+    counts = []
+    for email, accounts in [("me-one@example.com", 1), ("me-many@example.com", 6)]:
+        headers = register_customer(email, accounts)
+        client.get("/customers/me", headers=headers)  # Warm the principal cache
+        with count_queries() as statements:
+            r = client.get("/customers/me", headers=headers)
+        assert r.status_code == 200
+        assert len(r.json()["accounts"]) == accounts
+        counts.append(len(statements))
+    assert counts == [1, 1]
+
+
+def test_admin_customer_page_is_constant(client, admin_headers, register_customer, count_queries):
+    for i in range(12):
+        register_customer(f"page-{i}@example.com", accounts=2)
+
+    counts = []
+    for limit in (3, 10):
+        with count_queries() as statements:
+            r = client.get("/admin/customers", params={"limit": limit}, headers=admin_headers)
+        assert r.status_code == 200
+        items = r.json()["items"]
+        assert len(items) == limit and all(item["accounts"] for item in items)
+        counts.append(len(statements))
+    # The page, then one selectin load for all of its accounts
+    assert counts == [2, 2]
+
+
+def test_admin_search_is_constant(client, admin_headers, register_customer, count_queries):
+    for i in range(8):
+        register_customer(f"searchable-{i}@example.com", accounts=2)
+
+    counts = []
+    for limit in (2, 8):
+        with count_queries() as statements:
+            r = client.get("/admin/customers", params={"q": "searchable", "limit": limit}, headers=admin_headers)
+        assert r.status_code == 200
+        assert len(r.json()["items"]) == limit
+        counts.append(len(statements))
+    assert counts == [2, 2]
+
+
+def test_search_without_accounts_skips_the_account_load(register_customer, count_queries):
+    for i in range(4):
+        register_customer(f"lean-{i}@example.com", accounts=1)
+
+    with SessionLocal() as db:
+        with count_queries() as with_accounts:
+            assert len(search_customers(db, "lean-", with_accounts=True)) == 4
+    with SessionLocal() as db:
+        with count_queries() as without_accounts:
+            assert len(search_customers(db, "lean-", with_accounts=False)) == 4
+
+    assert len(with_accounts) == 2
+    assert len(without_accounts) == 1